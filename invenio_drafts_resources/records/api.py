@@ -24,7 +24,8 @@ identifier.
 import uuid
 from datetime import datetime
 
-from invenio_pidstore.models import PIDStatus
+from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_pidstore.providers.recordid_v2 import RecordIdProviderV2
 from invenio_records.systemfields import ModelField
 from invenio_records_resources.records import Record as RecordBase
@@ -91,16 +92,166 @@ class Record(RecordBase):
 
     @classmethod
     def get_records_by_parent(cls, parent, include_deleted=True):
-        """Get all sibling records for the specified parent record."""
-        query = cls.model_cls.query.filter_by(parent_id=parent.id)
+        """Get all sibling records for the specified parent record.
+
+        The versions state of the parent is fetched in the same query as the
+        siblings, and shared by all of them together with the given parent
+        record.
+        """
+        model_cls = cls.model_cls
+        versions_model_cls = cls.versions_model_cls
+        query = db.session.query(model_cls, versions_model_cls).outerjoin(
+            versions_model_cls,
+            versions_model_cls.parent_id == model_cls.parent_id,
+        ).filter(model_cls.parent_id == parent.id)
         if not include_deleted:
-            query = query.filter_by(is_deleted=False)
-        versions = query.all()
+            query = query.filter(model_cls.is_deleted == False)  # noqa
+
+        records = []
+        for rec_model, state in query:
+            record = cls(rec_model.data, model=rec_model, parent=parent)
+            if state is not None:
+                record.versions.set_state(state)
+            records.append(record)
+        return records
+
+    @classmethod
+    def get_ids_by_parent(cls, parent, include_deleted=True):
+        """Get the ids of all sibling records for the specified parent."""
+        model_cls = cls.model_cls
+        query = db.session.query(model_cls.id).filter(
+            model_cls.parent_id == parent.id)
+        if not include_deleted:
+            query = query.filter(model_cls.is_deleted == False)  # noqa
+        return [row.id for row in query]
+
+    @classmethod
+    def get_versions(cls, parent, after=None, limit=None):
+        """Get the versions of the specified parent record ordered by index.
+
+        The versions are paged through with keyset pagination on the
+        ``(parent_id, index)`` index. Soft-deleted versions are not included.
 
-        return [
-            cls(rec_model.data, model=rec_model, parent=parent)
-            for rec_model in versions
-        ]
+        :param after: Only include versions with an index greater than this.
+        :param limit: Maximum number of versions to return.
+        """
+        model_cls = cls.model_cls
+        versions_model_cls = cls.versions_model_cls
+        query = db.session.query(model_cls, versions_model_cls).outerjoin(
+            versions_model_cls,
+            versions_model_cls.parent_id == model_cls.parent_id,
+        ).filter(
+            model_cls.parent_id == parent.id,
+            model_cls.index != None,  # noqa
+            model_cls.is_deleted != True,  # noqa
+        ).order_by(model_cls.index)
+        if after is not None:
+            query = query.filter(model_cls.index > after)
+        if limit is not None:
+            query = query.limit(limit)
+
+        records = []
+        for rec_model, state in query:
+            record = cls(rec_model.data, model=rec_model, parent=parent)
+            if state is not None:
+                record.versions.set_state(state)
+            records.append(record)
+        return records
+
+    @classmethod
+    def iter_ids(cls, include_deleted=False, chunk_size=1000, lower=None,
+                 upper=None, after=None):
+        """Iterate over the ids of all records/drafts ordered by id.
+
+        The table is paged through with keyset pagination on the primary key,
+        so at most ``chunk_size`` ids are held in memory and no long-running
+        cursor is kept open on the table.
+
+        :param lower: Only include ids greater than or equal to this id.
+        :param upper: Only include ids strictly lower than this id.
+        :param after: Start iterating after this id (e.g. to resume).
+        """
+        model_cls = cls.model_cls
+        query = db.session.query(model_cls.id).order_by(model_cls.id)
+        if not include_deleted:
+            query = query.filter(model_cls.is_deleted != True)  # noqa
+        if lower is not None:
+            query = query.filter(model_cls.id >= lower)
+        if upper is not None:
+            query = query.filter(model_cls.id < upper)
+
+        last_id = after
+        while True:
+            chunk = query
+            if last_id is not None:
+                chunk = chunk.filter(model_cls.id > last_id)
+            ids = [row.id for row in chunk.limit(chunk_size)]
+            yield from ids
+            if len(ids) < chunk_size:
+                return
+            last_id = ids[-1]
+
+    @classmethod
+    def get_latest_id(cls, pid_value):
+        """Get the id of the latest published version of a record.
+
+        The persistent identifier, the record and the versions state are
+        resolved in a single joined query. ``None`` is returned if the value
+        is not the registered PID of an existing record, or if no version has
+        been published yet.
+        """
+        model_cls = cls.model_cls
+        versions_model_cls = cls.versions_model_cls
+        pid_field = cls.pid.field
+        row = db.session.query(versions_model_cls.latest_id).select_from(
+            PersistentIdentifier
+        ).join(
+            model_cls, model_cls.id == PersistentIdentifier.object_uuid,
+        ).join(
+            versions_model_cls,
+            versions_model_cls.parent_id == model_cls.parent_id,
+        ).filter(
+            PersistentIdentifier.pid_type == pid_field._pid_type,
+            PersistentIdentifier.pid_value == str(pid_value),
+            PersistentIdentifier.object_type == pid_field._object_type,
+            PersistentIdentifier.status == PIDStatus.REGISTERED,
+            model_cls.is_deleted != True,  # noqa
+        ).one_or_none()
+        return row.latest_id if row else None
+
+    @classmethod
+    def prefetch(cls, pid_values):
+        """Load the records with the given PID values in a single query.
+
+        The records are loaded together with their persistent identifiers,
+        parent records and versions states (including soft-deleted records),
+        as ``(pid, model, parent model, versions state)`` rows. As long as
+        the returned rows are referenced, the instances are kept in the
+        identity map of the session, so that the parents and versions states
+        of these records are not queried again one by one.
+        """
+        model_cls = cls.model_cls
+        parent_model_cls = cls.parent_record_cls.model_cls
+        versions_model_cls = cls.versions_model_cls
+        pid_field = cls.pid.field
+        return db.session.query(
+            PersistentIdentifier, model_cls, parent_model_cls,
+            versions_model_cls
+        ).select_from(
+            PersistentIdentifier
+        ).join(
+            model_cls, model_cls.id == PersistentIdentifier.object_uuid,
+        ).join(
+            parent_model_cls, parent_model_cls.id == model_cls.parent_id,
+        ).outerjoin(
+            versions_model_cls,
+            versions_model_cls.parent_id == model_cls.parent_id,
+        ).filter(
+            PersistentIdentifier.pid_type == pid_field._pid_type,
+            PersistentIdentifier.pid_value.in_(
+                [str(value) for value in pid_values]),
+            PersistentIdentifier.object_type == pid_field._object_type,
+        ).all()
 
     @classmethod
     def publish(cls, draft):
@@ -203,7 +354,13 @@ class Draft(Record):
             # We soft-delete a draft once it has been published, in order to
             # keep the version_id counter around for optimistic concurrency
             # control (both for ES indexing and for REST API clients)
-            draft = cls.get_record(record.id, with_deleted=True)
+            # The draft is looked up via the identity map of the session, in
+            # case it was already loaded (e.g. prefetched).
+            with db.session.no_autoflush:
+                model = cls.model_cls.query.get(record.id)
+            if model is None:
+                raise NoResultFound()
+            draft = cls(model.data, model=model)
             if draft.is_deleted:
                 draft.undelete()
                 # Below line is needed to dump PID back into the draft.
@@ -234,25 +391,77 @@ class Draft(Record):
         return draft
 
     @classmethod
-    def cleanup_drafts(cls, td):
+    def get_expired_pid_values(cls, td, limit=None, exclude=None):
+        """Get the PID values of the expired drafts.
+
+        A draft is expired if its expiry date has passed, and if it was not
+        updated within the last timedelta span of time (drafts created
+        before expiry dates were maintained have their creation date as
+        expiry date). The drafts are found with a range scan on the
+        ``expires_at`` index, oldest expiry date first.
+
+        :param limit: Maximum number of PID values to return.
+        :param exclude: PID values to leave out (e.g. of drafts which
+            failed to be deleted).
+        """
+        now = datetime.utcnow()
+        model_cls = cls.model_cls
+        pid_field = cls.pid.field
+        query = db.session.query(PersistentIdentifier.pid_value).join(
+            model_cls, model_cls.id == PersistentIdentifier.object_uuid,
+        ).filter(
+            PersistentIdentifier.pid_type == pid_field._pid_type,
+            PersistentIdentifier.object_type == pid_field._object_type,
+            model_cls.expires_at < now,
+            model_cls.updated < now - td,
+            model_cls.is_deleted != True,  # noqa
+        ).order_by(model_cls.expires_at)
+        if exclude:
+            query = query.filter(
+                PersistentIdentifier.pid_value.notin_(exclude))
+        if limit is not None:
+            query = query.limit(limit)
+        return [row.pid_value for row in query]
+
+    @classmethod
+    def cleanup_drafts(cls, td, batch_size=1000, limit=None):
         """Clean up (hard delete) all the soft deleted drafts.
 
         The drafts in the last timedelta span of time won't be deleted.
+
+        The cleanup is done with set-based queries, without loading the
+        drafts, and the drafts are deleted in batches of ``batch_size``.
+
+        :param limit: Maximum number of drafts to delete.
+        :returns: The number of deleted drafts.
         """
         timestamp = datetime.utcnow() - td
         draft_model = cls.model_cls
-        models = draft_model.query.filter(
+        versions_model = cls.versions_model_cls
+        expired = db.session.query(draft_model.id).filter(
             draft_model.is_deleted == True,  # noqa
             draft_model.updated < timestamp,
-        ).all()
+        )
 
         # we need to clear the foreign keys in the version info
-        for model in models:
-            draft = cls(model.data, model=model)
-            draft.versions.clear_next()
+        versions_model.query.filter(
+            versions_model.next_draft_id.in_(expired)
+        ).update(
+            {versions_model.next_draft_id: None},
+            synchronize_session=False,
+        )
 
         # now we can delete the drafts without violating foreign keys
-        ids = [model.id for model in models]
-        draft_model.query.filter(draft_model.id.in_(ids)).delete(
-            synchronize_session=False
-        )
+        deleted = 0
+        while limit is None or deleted < limit:
+            size = batch_size if limit is None \
+                else min(batch_size, limit - deleted)
+            ids = [row.id for row in expired.limit(size)]
+            if ids:
+                draft_model.query.filter(draft_model.id.in_(ids)).delete(
+                    synchronize_session=False
+                )
+                deleted += len(ids)
+            if len(ids) < size:
+                break
+        return deleted
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2022 CERN.
+#
+# Invenio-Drafts-Resources is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Alembic helpers for the indexes of the record and draft tables.
+
+The models are declared by the modules using this package, so are their
+Alembic recipes. These helpers create the indexes declared by the model
+mixins, e.g.:
+
+.. code-block:: python
+
+    def upgrade():
+        create_parent_indexes(op, "myrecords_metadata")
+        create_parent_indexes(op, "myrecords_drafts")
+        create_draft_indexes(op, "myrecords_drafts")
+"""
+
+import sqlalchemy as sa
+
+from .models import deleted_updated_index_name, parent_index_name
+
+
+def create_parent_indexes(op, table_name):
+    """Create the indexes of a record/draft table with a parent."""
+    op.create_index(
+        parent_index_name(table_name),
+        table_name,
+        ["parent_id", "index"],
+        unique=True,
+    )
+
+
+def drop_parent_indexes(op, table_name):
+    """Drop the indexes of a record/draft table with a parent."""
+    op.drop_index(parent_index_name(table_name), table_name=table_name)
+
+
+def create_draft_indexes(op, table_name):
+    """Create the indexes of a draft table."""
+    op.create_index(
+        op.f(f"ix_{table_name}_expires_at"),
+        table_name,
+        ["expires_at"],
+    )
+    op.create_index(
+        deleted_updated_index_name(table_name),
+        table_name,
+        ["updated"],
+        postgresql_where=sa.text("json IS NULL"),
+    )
+
+
+def drop_draft_indexes(op, table_name):
+    """Drop the indexes of a draft table."""
+    op.drop_index(
+        deleted_updated_index_name(table_name), table_name=table_name)
+    op.drop_index(
+        op.f(f"ix_{table_name}_expires_at"), table_name=table_name)
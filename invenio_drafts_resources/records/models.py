@@ -46,6 +46,11 @@ class ParentRecordMixin:
     index = db.Column(db.Integer, nullable=True)
     """The version index of the record."""
 
+    @declared_attr
+    def __table_args__(cls):
+        """Table indexes."""
+        return table_indexes(cls)
+
 
 class ParentRecordStateMixin:
     """Database model mixin to keep the state of the latest and next version.
@@ -125,12 +130,57 @@ class ParentRecordStateMixin:
 class DraftMetadataBase(RecordMetadataBase):
     """Represent a base class for draft metadata."""
 
+    @declared_attr
+    def __table_args__(cls):
+        """Table indexes."""
+        return table_indexes(cls)
+
     fork_version_id = db.Column(db.Integer)
     """Version ID of the record."""
 
     expires_at = db.Column(
         db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"),
         default=datetime.utcnow,
-        nullable=True
+        nullable=True,
+        index=True,
     )
     """Specifies when the draft expires. If `NULL` the draft doesn't expire."""
+
+
+#
+# Indexes
+#
+def parent_index_name(table_name):
+    """Name of the unique index on the parent id and version index."""
+    return f"ix_{table_name}_parent_id_index"
+
+
+def deleted_updated_index_name(table_name):
+    """Name of the index on the update date of soft-deleted drafts."""
+    return f"ix_{table_name}_deleted_updated"
+
+
+def table_indexes(cls):
+    """Get the indexes of a record or draft table.
+
+    - A unique index on ``(parent_id, index)`` for records/drafts with a
+      parent, used to get and order the versions of a parent record.
+    - An index on ``updated`` of the soft-deleted drafts (partial index on
+      PostgreSQL), used to clean up the soft-deleted drafts.
+
+    Both mixins define ``__table_args__`` with this function, so that the
+    indexes are declared independently of the order of the mixins.
+    """
+    table_name = cls.__tablename__
+    indexes = []
+    if issubclass(cls, ParentRecordMixin):
+        indexes.append(db.Index(
+            parent_index_name(table_name), "parent_id", "index", unique=True,
+        ))
+    if issubclass(cls, DraftMetadataBase):
+        indexes.append(db.Index(
+            deleted_updated_index_name(table_name),
+            "updated",
+            postgresql_where=db.text("json IS NULL"),
+        ))
+    return tuple(indexes)
@@ -11,6 +11,7 @@
 from invenio_db import db
 from invenio_records.systemfields import RelatedModelField
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import NoResultFound
 
 
 class ParentField(RelatedModelField):
@@ -113,7 +114,15 @@ class ParentField(RelatedModelField):
     def load_parent(field, record):
         """Serializer the object into a record."""
         if record.model.parent_id:
-            return record.parent_record_cls.get_record(record.model.parent_id)
+            # Look up the parent via the identity map of the session, so that
+            # the records/drafts of a parent loaded in the same transaction
+            # share a single parent model (and SQL query).
+            parent_record_cls = record.parent_record_cls
+            model = parent_record_cls.model_cls.query.get(
+                record.model.parent_id)
+            if model is None or model.is_deleted:
+                raise NoResultFound()
+            return parent_record_cls(model.data, model=model)
         return None
 
     @staticmethod
@@ -78,6 +78,16 @@ class VersionsManager:
         """The id of the next draft (and record)."""
         return self.state().next_draft_id
 
+    @property
+    def published_count(self):
+        """The number of published versions (soft-deleted ones included)."""
+        return self.latest_index or 0
+
+    @property
+    def draft_count(self):
+        """The number of drafts for a new version (0 or 1)."""
+        return int(self.next_draft_id is not None)
+
     #
     # Computed attributes
     #
@@ -103,17 +113,31 @@ class VersionsManager:
     # State management methods
     #
     def state(self, refresh=False):
-        """Retrieve the versions state."""
+        """Retrieve the versions state.
+
+        The state is retrieved by primary key, which means it's served from
+        the identity map of the database session if it was already loaded.
+        Thus, all version managers for the same parent share a single state
+        object (and a single SQL query) within a unit of work, and changes
+        made via ``set_next()``/``set_latest()``/``clear_next()`` are seen by
+        all of them.
+        """
         if self._state is None or refresh:
             # Get object if it exists
-            self._state = self.model_cls.query.filter_by(
-                parent_id=self.parent_id).one_or_none()
+            query = self.model_cls.query
+            if refresh:
+                query = query.populate_existing()
+            self._state = query.get(self.parent_id)
             if self._state is None:
                 # Object doesn't exists, so create it.
                 self._state = self.model_cls(parent_id=self.parent_id)
                 db.session.add(self._state)
         return self._state
 
+    def set_state(self, state):
+        """Set an already loaded versions state (e.g. from a sibling)."""
+        self._state = state
+
     def set_next(self):
         """Set this record as the next draft."""
         self.state().next_draft_id = self._record.id
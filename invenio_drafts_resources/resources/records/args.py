@@ -12,10 +12,16 @@
 
 from invenio_records_resources.resources.records.args import \
     SearchRequestArgsSchema as SearchRequestArgsSchemaBase
-from marshmallow import fields
+from marshmallow import Schema, fields
 
 
 class SearchRequestArgsSchema(SearchRequestArgsSchemaBase):
     """Extend schema with all versions field."""
 
     allversions = fields.Boolean()
+
+
+class BulkRequestSchema(Schema):
+    """Schema of the body of bulk actions."""
+
+    ids = fields.List(fields.String(), required=True)
@@ -9,10 +9,11 @@
 
 """Draft aware Record Resource Config override."""
 
+from flask_resources import JSONDeserializer, RequestBodyParser
 from invenio_records_resources.resources import \
     RecordResourceConfig as RecordResourceConfigBase
 
-from .args import SearchRequestArgsSchema
+from .args import BulkRequestSchema, SearchRequestArgsSchema
 
 
 class RecordResourceConfig(RecordResourceConfigBase):
@@ -29,6 +30,20 @@ class RecordResourceConfig(RecordResourceConfigBase):
         "item-draft": "/<pid_value>/draft",
         "item-publish": "/<pid_value>/draft/actions/publish",
         "item-files-import": "/<pid_value>/draft/actions/files-import",
+        "publish-many": "/actions/publish",
     }
 
     request_search_args = SearchRequestArgsSchema
+
+    request_bulk_schema = BulkRequestSchema
+
+    request_body_parsers = {
+        **RecordResourceConfigBase.request_body_parsers,
+        # Partial updates of drafts
+        "application/json-patch+json": RequestBodyParser(JSONDeserializer()),
+        "application/merge-patch+json": RequestBodyParser(JSONDeserializer()),
+    }
+
+    #: Cache-Control header of the redirect to the latest version of a record
+    #: (e.g. ``"public, max-age=60"``). No header is sent if ``None``.
+    latest_redirect_cache_control = None
@@ -24,16 +24,21 @@ class RedirectException(HTTPJSONException):
 
     code = 301
 
-    def __init__(self, location, **kwargs):
-        """Constructor."""
+    def __init__(self, location, headers=None, **kwargs):
+        """Constructor.
+
+        :param headers: Additional response headers (e.g. caching headers).
+        """
         self.location = location
+        self.headers = headers or {}
         kwargs.setdefault("description", "Redirecting...")
         super().__init__(**kwargs)
 
     def get_headers(self, environ=None, scope=None):
         """Get response headers."""
         return [
-            ("Content-Type", "application/json"), ("Location", self.location)]
+            ("Content-Type", "application/json"), ("Location", self.location)
+        ] + list(self.headers.items())
 
     def get_body(self, environ=None, scope=None):
         """Get the request body."""
@@ -43,3 +48,27 @@ class RedirectException(HTTPJSONException):
             "location": self.location
         }
         return json.dumps(body)
+
+
+class NotModifiedException(HTTPJSONException):
+    """Respond to a conditional request that the resource was not modified.
+
+    Raised when the ``If-None-Match`` header of a request matches the ETag of
+    the resource. The response has no body.
+    """
+
+    code = 304
+
+    def __init__(self, etag, headers=None, **kwargs):
+        """Constructor."""
+        self.etag = etag
+        self.headers = headers or {}
+        super().__init__(**kwargs)
+
+    def get_headers(self, environ=None, scope=None):
+        """Get response headers."""
+        return [("ETag", self.etag)] + list(self.headers.items())
+
+    def get_body(self, environ=None, scope=None):
+        """Get the request body."""
+        return ""
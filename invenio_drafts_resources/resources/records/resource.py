@@ -9,7 +9,7 @@
 
 """Invenio Drafts Resources module to create REST APIs."""
 
-from flask import g
+from flask import g, request
 from flask_resources import JSONSerializer, ResponseHandler, \
     resource_requestctx, response_handler, route, with_content_negotiation
 from invenio_records_resources.resources import \
@@ -18,8 +18,9 @@ from invenio_records_resources.resources.records.resource import \
     request_data, request_extra_args, request_headers, request_read_args, \
     request_search_args, request_view_args
 from invenio_records_resources.resources.records.utils import es_preference
+from werkzeug.http import quote_etag
 
-from .errors import RedirectException
+from .errors import NotModifiedException, RedirectException
 
 
 class RecordResource(RecordResourceBase):
@@ -58,8 +59,10 @@ class RecordResource(RecordResourceBase):
             route("GET", p(routes["item-draft"]), self.read_draft),
             route("POST", p(routes["item-draft"]), self.edit),
             route("PUT", p(routes["item-draft"]), self.update_draft),
+            route("PATCH", p(routes["item-draft"]), self.patch_draft),
             route("DELETE", p(routes["item-draft"]), self.delete_draft),
             route("POST", p(routes["item-publish"]), self.publish),
+            route("POST", p(routes["publish-many"]), self.publish_many),
             route("GET", s(routes["user-prefix"]), self.search_user_records),
         ]
 
@@ -150,6 +153,18 @@ class RecordResource(RecordResourceBase):
         )
         return item.to_dict(), 202
 
+    @request_data
+    @response_handler(many=True)
+    def publish_many(self):
+        """Publish many drafts.
+
+        POST /records/actions/publish
+        """
+        data = self.config.request_bulk_schema().load(
+            resource_requestctx.data or {})
+        result = self.service.publish_many(g.identity, data["ids"])
+        return result.to_dict(), 200
+
     @request_view_args
     @with_content_negotiation(
         response_handlers={
@@ -178,7 +193,20 @@ class RecordResource(RecordResourceBase):
             resource_requestctx.view_args["pid_value"],
             expand=resource_requestctx.args.get("expand", False),
         )
-        raise RedirectException(item["links"]["self"])
+
+        # The redirect only changes when a new version is published, so the
+        # validator is computed from the versions state of the parent.
+        versions = item._record.versions
+        etag = f"{versions.latest_id}-{versions.latest_index}"
+        headers = {}
+        if self.config.latest_redirect_cache_control:
+            headers["Cache-Control"] = \
+                self.config.latest_redirect_cache_control
+
+        if request.if_none_match.contains_weak(etag):
+            raise NotModifiedException(quote_etag(etag), headers=headers)
+        headers["ETag"] = quote_etag(etag)
+        raise RedirectException(item.links["self"], headers=headers)
 
     @request_extra_args
     @request_read_args
@@ -189,11 +217,23 @@ class RecordResource(RecordResourceBase):
 
         GET /records/:pid_value/draft
         """
+        # The ETag of a draft is its revision id
+        etags = request.if_none_match
+        revision_ids = {
+            int(etag) for etag in etags.as_set(include_weak=True)
+            if etag.isdigit()
+        }
+
         item = self.service.read_draft(
             g.identity,
             resource_requestctx.view_args["pid_value"],
             expand=resource_requestctx.args.get("expand", False),
+            revision_ids=revision_ids,
         )
+        etag = str(item._record.revision_id)
+        if etags.contains_weak(etag):
+            # Not modified: skip dumping and serializing the draft
+            raise NotModifiedException(quote_etag(etag))
         return item.to_dict(), 200
 
     @request_extra_args
@@ -215,6 +255,29 @@ class RecordResource(RecordResourceBase):
         )
         return item.to_dict(), 200
 
+    @request_extra_args
+    @request_headers
+    @request_view_args
+    @request_data
+    @response_handler()
+    def patch_draft(self):
+        """Partially update a draft.
+
+        PATCH /records/:pid_value/draft
+
+        The body is a JSON Patch or a JSON Merge Patch, as given by the
+        Content-Type header (other content types are rejected).
+        """
+        item = self.service.patch_draft(
+            g.identity,
+            resource_requestctx.view_args["pid_value"],
+            resource_requestctx.data,
+            request.mimetype,
+            revision_id=resource_requestctx.headers.get("if_match"),
+            expand=resource_requestctx.args.get("expand", False),
+        )
+        return item.to_dict(), 200
+
     @request_headers
     @request_view_args
     def delete_draft(self):
@@ -11,6 +11,7 @@
 """RecordDraft Service API config."""
 
 from flask_babelex import gettext as _
+from invenio_indexer.api import RecordIndexer
 from invenio_records_resources.services import ConditionalLink, RecordLink
 from invenio_records_resources.services import \
     RecordServiceConfig as RecordServiceConfigBase
@@ -20,6 +21,7 @@ from invenio_records_resources.services import pagination_links
 
 from .components import DraftMetadataComponent, PIDComponent
 from .permissions import RecordPermissionPolicy
+from .results import RecordBulkResult, RecordVersionsList
 from .schema import ParentSchema, RecordSchema
 from .search_params import AllVersionsParam
 
@@ -126,6 +128,47 @@ class RecordServiceConfig(RecordServiceConfigBase):
     # WHY: We want to force user input choice here.
     draft_cls = None
 
+    draft_indexer_cls = RecordIndexer
+
+    # Names of the bulk indexing queues of the records and drafts (see
+    # ``RecordService.rebuild_index()``). If ``None``, the name of the index
+    # of the record/draft class is used, so that each service has its own
+    # queues.
+    indexer_queue_name = None
+    draft_indexer_queue_name = None
+
+    # Number of ids fetched per query when paging through the database tables
+    # (e.g. when rebuilding the index).
+    rebuild_index_chunk_size = 1000
+
+    # Index refresh used when deleting a draft. ``True`` forces a refresh of
+    # the index, while ``"wait_for"`` waits for the next scheduled refresh so
+    # the deletion is visible in search without forcing one on every delete.
+    delete_draft_index_refresh = True
+
+    # Number of seconds by which indexing of an updated draft is delayed. The
+    # draft is only indexed if it wasn't updated again in the meantime, so a
+    # burst of updates (e.g. autosave) results in a single index request. If
+    # ``None``, updated drafts are indexed immediately.
+    draft_index_debounce = None
+
+    # Bulk operations (e.g. ``publish_many()``) are processed in chunks of
+    # this size, with one transaction and one bulk index request per chunk.
+    bulk_chunk_size = 100
+
+    result_bulk_cls = RecordBulkResult
+
+    # Versions listed from the database by ``list_versions()``.
+    result_versions_cls = RecordVersionsList
+    list_versions_size = 10
+    list_versions_max_size = 100
+
+    # Lifetime (timedelta) of a draft without activity. If set, creating or
+    # updating a draft sets its expiry date to now plus this lifetime, and
+    # expired drafts are deleted by the ``expire_drafts`` task. If ``None``,
+    # drafts don't expire.
+    draft_expiry = None
+
     schema = RecordSchema
 
     schema_parent = ParentSchema
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2022 CERN.
+#
+# Invenio-Drafts-Resources is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Bulk indexing and deletion of records and drafts."""
+
+from elasticsearch import VERSION as ES_VERSION
+from elasticsearch.helpers import bulk
+from elasticsearch.helpers import expand_action as default_expand_action
+from flask import current_app
+from invenio_indexer.utils import _es7_expand_action
+
+
+def bulk_index_records(indexer, records, **kwargs):
+    """Index already loaded records/drafts with a single bulk request.
+
+    Contrary to ``RecordIndexer.bulk_index()``, which sends the ids to a
+    message queue, the records are indexed right away and are not fetched
+    once more from the database.
+
+    :param indexer: The indexer used to dump the records.
+    :param records: Iterable of records/drafts.
+    :param kwargs: Passed to :func:`elasticsearch.helpers.bulk`. With
+        ``raise_on_error=False``, failed records are logged instead (except
+        for version conflicts, i.e. a newer revision is already indexed).
+    :returns: The number of successfully indexed records.
+    """
+    def actions():
+        for record in records:
+            index, doc_type = indexer.record_to_index(record)
+            body = indexer._prepare_record(record, index, doc_type, {})
+            index, doc_type = indexer._prepare_index(index, doc_type)
+            yield {
+                '_op_type': 'index',
+                '_index': index,
+                '_type': doc_type,
+                '_id': str(record.id),
+                '_version': record.revision_id,
+                '_version_type': indexer._version_type,
+                '_source': body,
+            }
+
+    return _bulk(indexer, actions(), ignore_status=(409, ), **kwargs)
+
+
+def bulk_delete_records(indexer, records, **kwargs):
+    """Delete records/drafts from the index with a single bulk request.
+
+    Records which are not in the index are ignored.
+
+    :param indexer: The indexer used to get the index of the records.
+    :param records: Iterable of records/drafts.
+    :param kwargs: Passed to :func:`elasticsearch.helpers.bulk`.
+    :returns: The number of successfully deleted records.
+    """
+    def actions():
+        for record in records:
+            index, doc_type = indexer.record_to_index(record)
+            index, doc_type = indexer._prepare_index(index, doc_type)
+            yield {
+                '_op_type': 'delete',
+                '_index': index,
+                '_type': doc_type,
+                '_id': str(record.id),
+                '_version': record.revision_id,
+                '_version_type': indexer._version_type,
+            }
+
+    kwargs.setdefault('raise_on_error', False)
+    return _bulk(indexer, actions(), ignore_status=(404, 409), **kwargs)
+
+
+def _bulk(indexer, actions, ignore_status=(), **kwargs):
+    """Send the actions with a bulk request.
+
+    Failed actions which are not raised are logged, unless their status is
+    in ``ignore_status``.
+    """
+    success, errors = bulk(
+        indexer.client,
+        actions,
+        stats_only=False,
+        expand_action_callback=(
+            _es7_expand_action if ES_VERSION[0] >= 7
+            else default_expand_action
+        ),
+        **kwargs
+    )
+    for error in errors:
+        for op_type, item in error.items():
+            if item.get('status') not in ignore_status:
+                current_app.logger.error(
+                    "Bulk %s of record %s in index %s failed: %s",
+                    op_type, item.get('_id'), item.get('_index'),
+                    item.get('error'),
+                )
+    return success
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2022 CERN.
+#
+# Invenio-Drafts-Resources is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Partial updates of drafts with JSON Patch and JSON Merge Patch."""
+
+from jsonpatch import JsonPatchException
+from jsonpatch import apply_patch as apply_json_patch
+from jsonpointer import JsonPointerException
+from marshmallow import ValidationError
+
+JSON_PATCH = "application/json-patch+json"
+"""Content type of a JSON Patch (RFC 6902)."""
+
+MERGE_PATCH = "application/merge-patch+json"
+"""Content type of a JSON Merge Patch (RFC 7396)."""
+
+
+def merge_patch(target, patch):
+    """Apply a JSON Merge Patch (RFC 7396) to a target document."""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def apply_patch(data, patch, content_type):
+    """Apply a patch to the data.
+
+    :param content_type: The content type of the patch, either
+        ``JSON_PATCH`` or ``MERGE_PATCH``.
+    :raises marshmallow.ValidationError: If the patch cannot be applied.
+    """
+    if content_type == JSON_PATCH:
+        if not isinstance(patch, list):
+            raise ValidationError("A JSON Patch must be a list.")
+        try:
+            return apply_json_patch(data, patch)
+        except (JsonPatchException, JsonPointerException) as e:
+            raise ValidationError(str(e))
+    elif content_type == MERGE_PATCH:
+        return merge_patch(data, patch)
+    raise ValidationError(f"Unsupported patch content type: {content_type}.")
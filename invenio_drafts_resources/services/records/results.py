@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2022 CERN.
+#
+# Invenio-Drafts-Resources is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Service results."""
+
+from invenio_records_resources.services.base import ServiceListResult
+
+
+class RecordBulkResult(ServiceListResult):
+    """Per-item results of a bulk operation on records/drafts.
+
+    The results are in the order of the requested items. Each one holds
+    either the result item of the operation, or the error that occurred.
+    """
+
+    def __init__(self, service, identity, results):
+        """Constructor.
+
+        :param results: list of ``(id, item, error)`` tuples, where ``id`` is
+            the requested id (if any), ``item`` the result on success and
+            ``error`` the raised exception on failure.
+        """
+        self._identity = identity
+        self._results = results
+        self._service = service
+
+    def __len__(self):
+        """Return the number of results."""
+        return len(self._results)
+
+    def __iter__(self):
+        """Iterate over the results as dictionaries."""
+        for id_, item, error in self._results:
+            if error is None:
+                yield {
+                    "id": item.id if id_ is None else id_,
+                    "status": "success",
+                }
+            else:
+                yield {
+                    "id": id_,
+                    "status": "error",
+                    "message": str(error) or type(error).__name__,
+                }
+
+    @property
+    def items(self):
+        """Get the results of the successful operations."""
+        return [item for _, item, error in self._results if error is None]
+
+    @property
+    def errors(self):
+        """Get the ``(id, error)`` pairs of the failed operations."""
+        return [
+            (id_, error) for id_, _, error in self._results
+            if error is not None
+        ]
+
+    def to_dict(self):
+        """Return result as a dictionary."""
+        return {
+            "hits": {
+                "hits": list(self),
+                "total": len(self),
+            },
+            "errors": len(self.errors),
+        }
+
+
+class RecordVersionsList(ServiceListResult):
+    """Page of the versions of a record loaded from the database."""
+
+    def __init__(self, service, identity, records, next_after,
+                 links_item_tpl=None, schema=None):
+        """Constructor.
+
+        :param records: the versions of the page readable by the identity,
+            ordered by index.
+        :param next_after: the index of the last version looked at, if there
+            are more versions.
+        """
+        self._identity = identity
+        self._records = records
+        self._next_after = next_after
+        self._service = service
+        self._schema = schema or service.schema
+        self._links_item_tpl = links_item_tpl
+
+    def __len__(self):
+        """Return the number of versions of the page."""
+        return len(self._records)
+
+    def __iter__(self):
+        """Iterator over the versions."""
+        return self.hits
+
+    @property
+    def total(self):
+        """Get the total number of versions.
+
+        Unknown, as the versions are filtered by permission page by page.
+        """
+        return None
+
+    @property
+    def next_after(self):
+        """Get the ``after`` parameter of the next page (if any)."""
+        return self._next_after
+
+    @property
+    def hits(self):
+        """Iterator over the versions."""
+        for record in self._records:
+            projection = self._schema.dump(
+                record,
+                context=dict(
+                    identity=self._identity,
+                    record=record,
+                )
+            )
+            if self._links_item_tpl:
+                projection['links'] = self._links_item_tpl.expand(record)
+            yield projection
+
+    def to_dict(self):
+        """Return result as a dictionary."""
+        return {
+            "hits": {
+                "hits": list(self.hits),
+                "total": self.total,
+            },
+            "next_after": self.next_after,
+        }
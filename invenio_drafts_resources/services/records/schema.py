@@ -19,6 +19,8 @@ class VersionsSchema(Schema):
     is_latest = fields.Boolean()
     is_latest_draft = fields.Boolean()
     index = fields.Integer()
+    published_count = fields.Integer()
+    draft_count = fields.Integer()
 
 
 class ParentSchema(Schema):
@@ -9,14 +9,49 @@
 
 """Primary service for working with records and drafts."""
 
+import uuid
+from datetime import datetime
+from itertools import islice
+
 from elasticsearch_dsl.query import Q
+from flask import current_app
+from invenio_db import db
+from invenio_records_resources.proxies import current_service_registry
 from invenio_records_resources.services import LinksTemplate
 from invenio_records_resources.services import \
     RecordService as RecordServiceBase
 from invenio_records_resources.services import ServiceSchemaWrapper
 from invenio_records_resources.services.uow import RecordCommitOp, \
-    RecordDeleteOp, RecordIndexOp, unit_of_work
+    RecordDeleteOp, TaskOp, unit_of_work
+from invenio_search import current_search_client
+from kombu import Queue
 from sqlalchemy.orm.exc import NoResultFound
+from werkzeug.local import LocalProxy
+
+from .indexer import bulk_index_records
+from .patch import apply_patch
+from .tasks import index_records, rebuild_index_shard
+from .uow import BulkUnitOfWork, DebouncedIndexOp, RecordBulkIndexOp
+
+
+def _bulk_id(item):
+    """Get the id of an item of a bulk operation (if it is an id)."""
+    return item if isinstance(item, str) else None
+
+
+def _prefetched(uow, record_cls):
+    """Get the rows prefetched for a bulk operation, by PID value.
+
+    :returns: ``None`` if the records/drafts of this class were not
+        prefetched for the unit of work.
+    """
+    return getattr(uow, "prefetched", {}).get(record_cls)
+
+
+def _shard_bounds(shards):
+    """Split the UUID space in ``shards`` ranges of equal size."""
+    bounds = [uuid.UUID(int=i * 2**128 // shards) for i in range(shards)]
+    return list(zip(bounds, bounds[1:] + [None]))
 
 
 class RecordService(RecordServiceBase):
@@ -58,6 +93,60 @@ class RecordService(RecordServiceBase):
         """Factory for creating a record class."""
         return self.config.draft_cls
 
+    @property
+    def draft_indexer(self):
+        """Factory for creating an indexer instance for drafts."""
+        return self.config.draft_indexer_cls(
+            record_cls=self.draft_cls,
+            record_to_index=self.record_to_index,
+            record_dumper=self.config.index_dumper,
+        )
+
+    def _rebuild_indexer(self):
+        """Create the indexer of the records used to rebuild the index."""
+        return self._create_queue_indexer(
+            self.config.indexer_cls,
+            self.record_cls,
+            self.config.indexer_queue_name,
+        )
+
+    def _rebuild_draft_indexer(self):
+        """Create the indexer of the drafts used to rebuild the index."""
+        return self._create_queue_indexer(
+            self.config.draft_indexer_cls,
+            self.draft_cls,
+            self.config.draft_indexer_queue_name,
+        )
+
+    def _create_queue_indexer(self, indexer_cls, record_cls, queue_name=None):
+        """Create an indexer with its own bulk indexing queue.
+
+        The queue consumer needs to know which API class to load the ids
+        with, so the records and drafts of a service get their own queues.
+        """
+        queue_name = queue_name or record_cls.index._name
+        return indexer_cls(
+            queue=LocalProxy(lambda: Queue(
+                queue_name,
+                exchange=current_app.config["INDEXER_MQ_EXCHANGE"],
+                routing_key=queue_name,
+            )),
+            routing_key=queue_name,
+            record_cls=record_cls,
+            record_to_index=self.record_to_index,
+            record_dumper=self.config.index_dumper,
+        )
+
+    @property
+    def result_bulk(self):
+        """Factory for creating the results of a bulk operation."""
+        return self.config.result_bulk_cls
+
+    @property
+    def result_versions(self):
+        """Factory for creating the versions listed from the database."""
+        return self.config.result_versions_cls
+
     # High-level API
     # Inherits record search, read, create, delete and update
 
@@ -141,12 +230,76 @@ class RecordService(RecordServiceBase):
             expand=expand,
         )
 
-    def read_draft(self, identity, id_, expand=False):
-        """Retrieve a draft."""
+    def list_versions(self, identity, id_, size=None, after=None):
+        """List the published versions of a record from the database.
+
+        Contrary to ``search_versions()``, the versions are read from the
+        database ordered by index, so newly published versions are listed
+        right away and no search cluster is needed. The versions are paged
+        through with keyset pagination: ``after`` is the index of the last
+        version of the previous page (i.e. ``next_after`` of its result).
+
+        The ``read`` permission is checked on each version, and the versions
+        the identity cannot read are skipped. Hence, a page may hold fewer
+        than ``size`` versions and the total number of versions is not
+        known.
+        """
+        try:
+            record = self.record_cls.pid.resolve(id_, registered_only=False)
+            self.require_permission(identity, "read", record=record)
+        except NoResultFound:
+            # Unpublished draft of a new version
+            record = self.draft_cls.pid.resolve(id_, registered_only=False)
+            self.require_permission(identity, "read_draft", record=record)
+
+        size = min(
+            int(size or self.config.list_versions_size),
+            self.config.list_versions_max_size,
+        )
+        after = int(after) if after is not None else None
+        records = []
+        has_next = False
+        while not has_next:
+            # Fetch one more version to tell if there is a next page
+            versions = self.record_cls.get_versions(
+                record.parent, after=after, limit=size + 1)
+            for version in versions:
+                if len(records) == size:
+                    has_next = True
+                    break
+                after = version.versions.index
+                if self.check_permission(identity, "read", record=version):
+                    records.append(version)
+            if len(versions) <= size:
+                break
+
+        return self.result_versions(
+            self,
+            identity,
+            records,
+            after if has_next else None,
+            links_item_tpl=self.links_item_tpl,
+        )
+
+    def read_draft(self, identity, id_, expand=False, revision_ids=None):
+        """Retrieve a draft.
+
+        If the current revision of the draft is one of ``revision_ids``
+        (i.e. the caller already has this revision), the components are not
+        run.
+        """
         # Resolve and require permission
         draft = self.draft_cls.pid.resolve(id_, registered_only=False)
         self.require_permission(identity, "read_draft", record=draft)
 
+        if revision_ids and draft.revision_id in revision_ids:
+            return self.result_item(
+                self, identity, draft,
+                links_tpl=self.links_item_tpl,
+                expandable_fields=self.expandable_fields,
+                expand=expand,
+            )
+
         # Run components
         for component in self.components:
             if hasattr(component, 'read_draft'):
@@ -161,12 +314,17 @@ class RecordService(RecordServiceBase):
 
     def read_latest(self, identity, id_, expand=False):
         """Retrieve latest record."""
-        # Resolve and require permission
-        record = self.record_cls.pid.resolve(id_)
-
-        # Retrieve latest if record is not
-        if not record.versions.is_latest:
-            record = self.record_cls.get_record(record.versions.latest_id)
+        # Fast path: resolve the latest id in a single query, so only the
+        # latest record is loaded.
+        latest_id = self.record_cls.get_latest_id(id_)
+        if latest_id is not None:
+            record = self.record_cls.get_record(latest_id)
+        else:
+            # Resolve (raising the PID errors) and retrieve latest if record
+            # is not
+            record = self.record_cls.pid.resolve(id_)
+            if not record.versions.is_latest:
+                record = self.record_cls.get_record(record.versions.latest_id)
 
         self.require_permission(identity, "read", record=record)
 
@@ -188,6 +346,39 @@ class RecordService(RecordServiceBase):
         # Permissions
         self.require_permission(identity, "update_draft", record=draft)
 
+        return self._update_draft(identity, draft, data, uow, expand)
+
+    @unit_of_work()
+    def patch_draft(self, identity, id_, patch, content_type,
+                    revision_id=None, uow=None, expand=False):
+        """Partially update a draft.
+
+        The patch is either a JSON Patch (RFC 6902) or a JSON Merge Patch
+        (RFC 7396), as given by its ``content_type``. It is applied to the
+        draft as dumped by the service schema, and the result is saved like
+        in ``update_draft()``.
+        """
+        draft = self.draft_cls.pid.resolve(id_, registered_only=False)
+
+        self.check_revision_id(draft, revision_id)
+
+        # Permissions
+        self.require_permission(identity, "update_draft", record=draft)
+
+        data = self.schema.dump(
+            draft,
+            context=dict(
+                identity=identity,
+                pid=draft.pid,
+                record=draft,
+            ),
+        )
+        data = apply_patch(data, patch, content_type)
+
+        return self._update_draft(identity, draft, data, uow, expand)
+
+    def _update_draft(self, identity, draft, data, uow, expand):
+        """Update a draft with the given data."""
         # Load data with service schema
         data, errors = self.schema.load(
             data,
@@ -202,13 +393,27 @@ class RecordService(RecordServiceBase):
         )
 
         # Run components
+        original = draft.model.json
         self.run_components(
             'update_draft', identity, record=draft, data=data,
             errors=errors, uow=uow
         )
 
-        # Commit and index
-        uow.register(RecordCommitOp(draft, indexer=self.indexer))
+        # Commit and index, unless nothing was changed (e.g. autosave of an
+        # unchanged form), to not bump the revision and reindex the draft.
+        if self._draft_data(draft) != original or \
+                db.session.is_modified(draft.model):
+            self._extend_expiry(draft)
+            debounce = self.config.draft_index_debounce
+            if debounce is None:
+                uow.register(RecordCommitOp(draft, indexer=self.indexer))
+            else:
+                uow.register(RecordCommitOp(draft))
+                uow.register(DebouncedIndexOp(
+                    current_service_registry.get_service_id(self),
+                    draft,
+                    debounce,
+                ))
 
         return self.result_item(
             self,
@@ -220,6 +425,32 @@ class RecordService(RecordServiceBase):
             expand=expand,
         )
 
+    @unit_of_work()
+    def extend_draft_expiry(self, identity, id_, uow=None, expand=False):
+        """Extend the expiry date of a draft (e.g. on user activity).
+
+        The expiry date is set to now plus the configured ``draft_expiry``.
+        Only the ``expires_at`` column is updated: the draft is neither
+        committed nor reindexed, so its revision stays the same.
+        """
+        draft = self.draft_cls.pid.resolve(id_, registered_only=False)
+
+        # Permissions
+        self.require_permission(identity, "update_draft", record=draft)
+
+        if self.config.draft_expiry is not None:
+            # A query-level update bypasses the version counter of the model
+            expires_at = datetime.utcnow() + self.config.draft_expiry
+            self.draft_cls.model_cls.query.filter_by(id=draft.id).update(
+                {"expires_at": expires_at}, synchronize_session="evaluate")
+
+        return self.result_item(
+            self, identity, draft,
+            links_tpl=self.links_item_tpl,
+            expandable_fields=self.expandable_fields,
+            expand=expand,
+        )
+
     @unit_of_work()
     def create(self, identity, data, uow=None, expand=False):
         """Create a draft for a new record.
@@ -234,9 +465,21 @@ class RecordService(RecordServiceBase):
            uow=uow,
            expand=expand,
         )
+        self._extend_expiry(res._record)
         uow.register(RecordCommitOp(res._record.parent))
         return res
 
+    def create_many(self, identity, data):
+        """Create many drafts.
+
+        The drafts (and their parents) are created in chunks, with one
+        transaction and one bulk index request per chunk.
+
+        :param data: list of input data, one per draft.
+        :returns: the per-item results, in the order of the input data.
+        """
+        return self._bulk(identity, data, self.create)
+
     @unit_of_work()
     def edit(self, identity, id_, uow=None, expand=False):
         """Create a new revision or a draft for an existing record.
@@ -245,7 +488,8 @@ class RecordService(RecordServiceBase):
         """
         # Draft exists - return it
         try:
-            draft = self.draft_cls.pid.resolve(id_, registered_only=False)
+            draft = self._resolve(
+                self.draft_cls, id_, uow=uow, registered_only=False)
             self.require_permission(identity, "edit", record=draft)
             return self.result_item(
                 self, identity, draft, links_tpl=self.links_item_tpl)
@@ -254,7 +498,7 @@ class RecordService(RecordServiceBase):
 
         # Draft does not exists - so get the main record we want to edit and
         # create a draft from it
-        record = self.record_cls.pid.resolve(id_)
+        record = self._resolve(self.record_cls, id_, uow=uow)
         self.require_permission(identity, "edit", record=record)
         draft = self.draft_cls.edit(record)
 
@@ -262,11 +506,12 @@ class RecordService(RecordServiceBase):
         self.run_components(
             "edit", identity, draft=draft, record=record, uow=uow)
 
-        uow.register(RecordCommitOp(draft, indexer=self.indexer))
+        uow.register(RecordCommitOp(draft))
+        uow.register(RecordBulkIndexOp(draft, indexer=self.indexer))
 
         # Reindex the record to trigger update of computed values in the
         # available dumpers of the record.
-        uow.register(RecordIndexOp(record, indexer=self.indexer))
+        uow.register(RecordBulkIndexOp(record, indexer=self.indexer))
 
         return self.result_item(
             self, identity, draft,
@@ -275,6 +520,22 @@ class RecordService(RecordServiceBase):
             expand=expand,
         )
 
+    def edit_many(self, identity, ids):
+        """Create or get the drafts of many records for editing.
+
+        The records are processed in chunks, with one transaction per chunk.
+        The records and the existing (also soft-deleted) drafts of a chunk
+        are loaded together with their PIDs, parents and versions states in
+        one query each, and all drafts and records of a chunk are indexed
+        with a single bulk request.
+
+        :returns: the per-item results, holding the drafts on success.
+        """
+        return self._bulk(
+            identity, ids, self.edit,
+            prefetch=(self.record_cls, self.draft_cls),
+        )
+
     @unit_of_work()
     def publish(self, identity, id_, uow=None, expand=False):
         """Publish a draft.
@@ -304,7 +565,8 @@ class RecordService(RecordServiceBase):
             'publish', identity, draft=draft, record=record, uow=uow)
 
         # Commit and index
-        uow.register(RecordCommitOp(record, indexer=self.indexer))
+        uow.register(RecordCommitOp(record))
+        uow.register(RecordBulkIndexOp(record, indexer=self.indexer))
         uow.register(RecordDeleteOp(draft, force=False, indexer=self.indexer))
 
         if latest_id:
@@ -317,12 +579,22 @@ class RecordService(RecordServiceBase):
             expand=expand,
         )
 
+    def publish_many(self, identity, ids):
+        """Publish many drafts.
+
+        The drafts are published in chunks, with one transaction and one bulk
+        index request per chunk.
+
+        :returns: the per-item results of the publication.
+        """
+        return self._bulk(identity, ids, self.publish)
+
     @unit_of_work()
     def new_version(self, identity, id_, uow=None, expand=False):
         """Create a new version of a record."""
         # Get the a record - i.e. you can only create a new version in case
         # at least one published record already exists.
-        record = self.record_cls.pid.resolve(id_)
+        record = self._resolve(self.record_cls, id_, uow=uow)
 
         # Check permissions
         self.require_permission(identity, "new_version", record=record)
@@ -346,7 +618,8 @@ class RecordService(RecordServiceBase):
             'new_version', identity, draft=next_draft, record=record, uow=uow)
 
         # Commit and index
-        uow.register(RecordCommitOp(next_draft, indexer=self.indexer))
+        uow.register(RecordCommitOp(next_draft))
+        uow.register(RecordBulkIndexOp(next_draft, indexer=self.indexer))
 
         self._reindex_latest(
             next_draft.versions.latest_id, record=record, uow=uow)
@@ -358,10 +631,28 @@ class RecordService(RecordServiceBase):
             expand=expand,
         )
 
+    def new_version_many(self, identity, ids):
+        """Create a new version of many records.
+
+        The records are processed in chunks, with one transaction per chunk.
+        The records of a chunk and their drafts (if being edited) are loaded
+        together with their PIDs, parents and versions states in one query
+        each, and all drafts and latest records of a chunk are indexed with a
+        single bulk request. Records which are not the latest version are
+        still loaded one by one.
+
+        :returns: the per-item results of the operation.
+        """
+        return self._bulk(
+            identity, ids, self.new_version,
+            prefetch=(self.record_cls, self.draft_cls),
+        )
+
     @unit_of_work()
     def delete_draft(self, identity, id_, revision_id=None, uow=None):
         """Delete a record from database and search indexes."""
-        draft = self.draft_cls.pid.resolve(id_, registered_only=False)
+        draft = self._resolve(
+            self.draft_cls, id_, uow=uow, registered_only=False)
         latest_id = draft.versions.latest_id
 
         self.check_revision_id(draft, revision_id)
@@ -370,10 +661,8 @@ class RecordService(RecordServiceBase):
         self.require_permission(identity, "delete_draft", record=draft)
 
         # Get published record if exists
-        try:
-            record = self.record_cls.get_record(draft.id)
-        except NoResultFound:
-            record = None
+        record = self._get_counterpart(
+            self.record_cls, draft, pid_value=id_, uow=uow)
 
         # We soft-delete a draft when a published record exists, in order to
         # keep the version_id counter around for optimistic concurrency
@@ -392,23 +681,56 @@ class RecordService(RecordServiceBase):
         # We refresh the index because users are usually redirected to a
         # search result immediately after, and we don't want the users to see
         # their just deleted draft.
+        refresh = self.config.delete_draft_index_refresh
         uow.register(RecordDeleteOp(
-            draft, indexer=self.indexer, force=force, index_refresh=True))
+            draft, indexer=self.indexer, force=force, index_refresh=refresh))
 
         if force:
             # Case 1: We deleted a new draft (without a published record) or a
             # new version draft (without a published).
             # In this case, we reindex the latest published record/draft
-            self._reindex_latest(latest_id, refresh=True, uow=uow)
+            self._reindex_latest(latest_id, refresh=refresh, uow=uow)
         else:
             # Case 2: We deleted a draft for a published record.
             # In this case we reindex just the published record to trigger and
             # update of computed values.
-            uow.register(RecordIndexOp(
-                record, indexer=self.indexer, index_refresh=True))
+            uow.register(RecordBulkIndexOp(
+                record, indexer=self.indexer, index_refresh=refresh))
 
         return True
 
+    def delete_drafts_many(self, identity, ids):
+        """Delete many drafts.
+
+        The drafts are processed in chunks, with one transaction per chunk.
+        The drafts of a chunk and their published records (if any) are
+        loaded together with their PIDs, parents and versions states in one
+        query each, and are deleted from the index with one bulk request. The
+        indices are refreshed once at the end.
+
+        :returns: the per-item results of the deletion.
+        """
+        return self._bulk(
+            identity, ids, self.delete_draft,
+            prefetch=(self.draft_cls, self.record_cls),
+        )
+
+    def delete_expired_drafts(self, identity, limit=None, exclude=None):
+        """Delete the expired drafts.
+
+        Does nothing unless ``draft_expiry`` is configured.
+
+        :param int limit: maximum number of drafts to delete.
+        :param exclude: ids of drafts not to delete (e.g. which already
+            failed to be deleted).
+        :returns: the per-item results of the deletion.
+        """
+        ids = []
+        if self.config.draft_expiry is not None:
+            ids = self.draft_cls.get_expired_pid_values(
+                self.config.draft_expiry, limit=limit, exclude=exclude)
+        return self.delete_drafts_many(identity, ids)
+
     @unit_of_work()
     def import_files(self, identity, id_, uow=None):
         """Import files from previous record version."""
@@ -439,19 +761,191 @@ class RecordService(RecordServiceBase):
             links_item_tpl=self.draft_files.file_links_item_tpl(id_),
         )
 
-    def rebuild_index(self, identity):
+    def rebuild_index(self, identity, uow=None, shards=None):
         """Reindex all records and drafts.
 
+        The ids are streamed from the database in chunks and sent to the bulk
+        indexing queues of the service, so memory usage is bounded
+        independently of the number of records and drafts. The queues are
+        consumed by ``process_bulk_queues()`` (e.g. by scheduling the
+        ``process_bulk_queues`` task with Celery beat).
+
         Note: Skips (soft) deleted records and drafts.
+
+        :param shards: If set, the id space of the records and drafts is
+            instead split in the given number of ranges, and each range is
+            reindexed by a separate Celery task (see ``rebuild_index_shard``).
         """
-        ret_val = super().rebuild_index(identity)
+        if shards:
+            service_id = current_service_registry.get_service_id(self)
+            for lower, upper in _shard_bounds(shards):
+                for draft in (False, True):
+                    rebuild_index_shard.delay(
+                        service_id,
+                        lower=str(lower),
+                        upper=str(upper) if upper else None,
+                        draft=draft,
+                    )
+            return True
+
+        chunk_size = self.config.rebuild_index_chunk_size
+        self._rebuild_indexer().bulk_index(
+            self.record_cls.iter_ids(chunk_size=chunk_size))
+        self._rebuild_draft_indexer().bulk_index(
+            self.draft_cls.iter_ids(chunk_size=chunk_size))
+        return True
 
-        for draft_meta in self.draft_cls.model_cls.query.all():
-            draft = self.draft_cls(draft_meta.data, model=draft_meta)
-            if not draft.is_deleted:
-                self.indexer.index(draft)
+    def process_bulk_queues(self, es_bulk_kwargs=None):
+        """Index the records and drafts of the bulk indexing queues.
 
-        return ret_val
+        :param dict es_bulk_kwargs: Passed to
+            :func:`elasticsearch:elasticsearch.helpers.bulk`.
+        :returns: The number of indexed records and drafts.
+        """
+        return sum(
+            indexer.process_bulk_queue(es_bulk_kwargs=es_bulk_kwargs)
+            for indexer in (
+                self._rebuild_indexer(), self._rebuild_draft_indexer())
+        )
+
+    def rebuild_index_shard(self, identity, lower=None, upper=None,
+                            after=None, draft=False):
+        """Reindex the next chunk of records or drafts in an id range.
+
+        The chunk is indexed with a single bulk request. Records which fail
+        to be indexed are logged with their id (to be reindexed once the
+        cause is fixed), and don't prevent the rest of the range from being
+        reindexed.
+
+        :param lower: Lower bound (inclusive) of the id range.
+        :param upper: Upper bound (exclusive) of the id range.
+        :param after: Id of the last record/draft already reindexed.
+        :param draft: Reindex the drafts instead of the records.
+        :returns: The id of the last reindexed record/draft, or ``None`` when
+            the end of the range has been reached.
+        """
+        record_cls = self.draft_cls if draft else self.record_cls
+        indexer = self.draft_indexer if draft else self.indexer
+        chunk_size = self.config.rebuild_index_chunk_size
+
+        ids = list(islice(
+            record_cls.iter_ids(
+                chunk_size=chunk_size, lower=lower, upper=upper, after=after),
+            chunk_size
+        ))
+        if ids:
+            bulk_index_records(
+                indexer, record_cls.get_records(ids), raise_on_error=False)
+
+        return ids[-1] if len(ids) == chunk_size else None
+
+    def _bulk(self, identity, items, action, prefetch=None):
+        """Run an action for many items, with one transaction per chunk.
+
+        The records committed by the action are indexed with one bulk request
+        per chunk. If the action fails for an item, the chunk is rolled back
+        and its items are processed again one by one, each in its own
+        transaction, so that one failing item doesn't fail the entire chunk.
+
+        :param items: the ids (or data) to run the action for.
+        :param action: service method called with the identity, an item and
+            the unit of work, and returning a result item.
+        :param prefetch: record/draft classes whose records with the PID
+            values of a chunk are loaded at once (see ``Record.prefetch()``).
+            The rows are kept on the units of work of the chunk, and are used
+            by ``_resolve()``.
+        """
+        results = []
+        refresh_indices = set()
+        items = iter(items)
+        while True:
+            chunk = list(islice(items, self.config.bulk_chunk_size))
+            if not chunk:
+                break
+            # PID values of the chunk without a record/draft are kept too
+            prefetched = {}
+            for record_cls in prefetch or ():
+                rows = dict.fromkeys(str(item) for item in chunk)
+                rows.update(
+                    (row[0].pid_value, row)
+                    for row in record_cls.prefetch(chunk)
+                )
+                prefetched[record_cls] = rows
+            for uow, result in self._bulk_chunk(
+                    identity, chunk, action, prefetched):
+                results.append(result)
+                refresh_indices |= uow.refresh_indices
+
+        # Refresh the indices once, instead of once per chunk
+        if refresh_indices:
+            current_search_client.indices.refresh(
+                index=",".join(sorted(refresh_indices)))
+
+        return self.result_bulk(self, identity, results)
+
+    def _bulk_chunk(self, identity, chunk, action, prefetched):
+        """Run an action for a chunk of items in one transaction.
+
+        If the action or the transaction fails, the chunk is rolled back and
+        its items are processed one by one. If the transaction succeeds but
+        its commit operations fail (e.g. indexing), the changes are stored
+        and the error is reported for each item.
+
+        :returns: list of ``(uow, result)`` pairs, one per item.
+        """
+        uow = BulkUnitOfWork(db.session, prefetched=prefetched)
+        try:
+            results = [
+                (uow, (_bulk_id(item), action(identity, item, uow=uow), None))
+                for item in chunk
+            ]
+            uow.commit()
+            return results
+        except Exception as e:
+            if uow.committed:
+                return [(uow, (_bulk_id(item), None, e)) for item in chunk]
+            uow.rollback()
+
+        return [
+            self._bulk_item(identity, item, action, prefetched)
+            for item in chunk
+        ]
+
+    def _bulk_item(self, identity, item, action, prefetched):
+        """Run an action for a single item in its own transaction.
+
+        :returns: ``(uow, result)`` pair.
+        """
+        uow = BulkUnitOfWork(db.session, prefetched=prefetched)
+        try:
+            res = action(identity, item, uow=uow)
+            uow.commit()
+        except Exception as e:
+            if not uow.committed:
+                uow.rollback()
+            return uow, (_bulk_id(item), None, e)
+        return uow, (_bulk_id(item), res, None)
+
+    def _draft_data(self, draft):
+        """Get the data of a draft as it would be stored on commit.
+
+        Some system fields (e.g. files) only write their values into the
+        draft on commit, so their pre-commit hooks are run first. The result
+        compares to the stored ``draft.model.json``.
+        """
+        for e in draft._extensions:
+            e.pre_commit(draft)
+        return draft.model.encode(dict(draft))
+
+    def _extend_expiry(self, draft):
+        """Set the expiry date of a draft, if drafts expire.
+
+        :returns: ``True`` if the expiry date was set.
+        """
+        if self.config.draft_expiry is None:
+            return False
+        draft.expires_at = datetime.utcnow() + self.config.draft_expiry
+        return True
 
     def validate_draft(self, identity, id_):
         """Validate a draft."""
@@ -497,19 +991,59 @@ class RecordService(RecordServiceBase):
 
         # Note, the record may not be the latest published record, and we only
         # want to index the latest published.
+        pid_value = None
         if record is None or latest_id != record.id:
             record = self.record_cls.get_record(latest_id)
-        uow.register(
-            RecordIndexOp(record, indexer=self.indexer, index_refresh=refresh))
+        elif _prefetched(uow, self.draft_cls) is not None:
+            pid_value = record.pid.pid_value
+        uow.register(RecordBulkIndexOp(
+            record, indexer=self.indexer, index_refresh=refresh))
 
         # Note, a draft may or may not exists for a published record (depending
         # on if it's being edited).
-        try:
-            draft = self.draft_cls.get_record(latest_id)
-            uow.register(RecordIndexOp(
+        draft = self._get_counterpart(
+            self.draft_cls, record, pid_value=pid_value, uow=uow)
+        if draft is not None:
+            uow.register(RecordBulkIndexOp(
                 draft, indexer=self.indexer, index_refresh=refresh))
+
+    def _resolve(self, record_cls, id_, uow=None, registered_only=True):
+        """Resolve a PID value to a record/draft.
+
+        The records/drafts prefetched for a bulk operation (see ``_bulk()``)
+        are resolved without any query. Otherwise (and for PIDs which don't
+        resolve to a record/draft), the PID is resolved as usual.
+        """
+        row = (_prefetched(uow, record_cls) or {}).get(str(id_))
+        if row is not None:
+            pid, model = row[0], row[1]
+            if not (pid.is_deleted() or pid.is_redirected()) and \
+                    (pid.is_registered() or not registered_only):
+                if model.is_deleted:
+                    raise NoResultFound()
+                record = record_cls(model.data, model=model)
+                record_cls.pid.field._set_cache(record, pid)
+                return record
+        return record_cls.pid.resolve(id_, registered_only=registered_only)
+
+    def _get_counterpart(self, record_cls, record, pid_value=None, uow=None):
+        """Get the record or draft sharing its id (and PID) with another.
+
+        :param pid_value: PID value of the record, to look up the
+            records/drafts prefetched for a bulk operation.
+        :returns: the record/draft, or ``None`` if it doesn't exist (or is
+            soft-deleted).
+        """
+        prefetched = _prefetched(uow, record_cls) or {}
+        if pid_value is not None and str(pid_value) in prefetched:
+            row = prefetched[str(pid_value)]
+            if row is None or row[1].is_deleted:
+                return None
+            return record_cls(row[1].data, model=row[1])
+        try:
+            return record_cls.get_record(record.id)
         except NoResultFound:
-            pass
+            return None
 
     def _get_record_and_parent_by_id(self, id_):
         """Resolve the record and its parent, by the given ID.
@@ -533,32 +1067,46 @@ class RecordService(RecordServiceBase):
     def _index_related_records(self, record, parent, uow=None):
         """Index all records that are related to the specified ones.
 
+        Only the given record is indexed right after the commit. All its
+        siblings (records and drafts) are sent to a Celery task, which
+        indexes them with bulk requests.
+
         Soft deleted records (including published drafts) will not be indexed
         because the JSON payload is empty.
         """
         _parent = parent or record.parent
-        siblings = self.record_cls.get_records_by_parent(
+        uow.register(RecordBulkIndexOp(record, indexer=self.indexer))
+
+        record_ids = self.record_cls.get_ids_by_parent(
             _parent, include_deleted=False
         )
-
+        draft_ids = []
         if self.draft_cls is not None:
             # if drafts are available, reindex them as well
-            drafts = self.draft_cls.get_records_by_parent(
+            draft_ids = self.draft_cls.get_ids_by_parent(
                 _parent, include_deleted=False
             )
-            siblings.extend(drafts)
 
-        # TODO only index the current record immediately;
-        #      all siblings should be sent to a high-priority celery task
-        #      instead (requires bulk indexing to work)
-        for sibling in siblings:
-            uow.register(RecordIndexOp(sibling, indexer=self.indexer))
+        if record.is_draft:
+            draft_ids = [id_ for id_ in draft_ids if id_ != record.id]
+        else:
+            record_ids = [id_ for id_ in record_ids if id_ != record.id]
+
+        if record_ids or draft_ids:
+            uow.register(TaskOp(
+                index_records,
+                current_service_registry.get_service_id(self),
+                record_ids=[str(id_) for id_ in record_ids],
+                draft_ids=[str(id_) for id_ in draft_ids],
+            ))
 
     @unit_of_work()
-    def cleanup_drafts(self, timedelta, uow=None):
+    def cleanup_drafts(self, timedelta, limit=None, uow=None):
         """Hard delete of soft deleted drafts.
 
         :param int timedelta: timedelta that should pass since
             the last update of the draft in order to be hard deleted.
+        :param int limit: maximum number of drafts to delete.
+        :returns: the number of deleted drafts.
         """
-        self.draft_cls.cleanup_drafts(timedelta)
+        return self.draft_cls.cleanup_drafts(timedelta, limit=limit)
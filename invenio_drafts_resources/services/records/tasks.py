@@ -8,19 +8,180 @@
 
 """Celery tasks to manage drafts."""
 
+import time
 from datetime import timedelta
 
 from celery import shared_task
+from flask import current_app
+from invenio_access.permissions import system_identity
 from invenio_records_resources.proxies import current_service_registry
+from sqlalchemy.orm.exc import NoResultFound
+
+from .indexer import bulk_index_records
 
 
 @shared_task(ignore_result=True)
-def cleanup_drafts(seconds=3600):
+def cleanup_drafts(seconds=3600, batch_size=None, time_limit=None):
     """Hard delete of soft deleted drafts.
 
+    If a batch size is given, the drafts are deleted in batches with one
+    transaction per batch, so that the drafts table is never locked for long.
+    The task stops once all drafts have been deleted or once the time limit
+    is exceeded, in which case it enqueues itself again to delete the
+    remaining drafts.
+
     :param int seconds: numbers of seconds that should pass since the
         last update of the draft in order to be hard deleted.
+    :param int batch_size: maximum number of drafts deleted per transaction.
+    :param int time_limit: number of seconds after which the task re-enqueues
+        itself instead of starting a new batch.
     """
     timedelta_param = timedelta(seconds=seconds)
     service = current_service_registry.get("records")
-    service.cleanup_drafts(timedelta_param)
+    if batch_size is None:
+        service.cleanup_drafts(timedelta_param)
+        return
+
+    task_start = time.monotonic()
+    while True:
+        batch_start = time.monotonic()
+        deleted = service.cleanup_drafts(timedelta_param, limit=batch_size)
+        current_app.logger.info(
+            "Cleanup drafts: deleted %s drafts in %.3f seconds.",
+            deleted, time.monotonic() - batch_start
+        )
+        if deleted < batch_size:
+            return
+        if time_limit is not None and \
+                time.monotonic() - task_start >= time_limit:
+            cleanup_drafts.delay(
+                seconds=seconds, batch_size=batch_size, time_limit=time_limit)
+            return
+
+
+@shared_task(ignore_result=True)
+def expire_drafts(batch_size=100):
+    """Delete the expired drafts.
+
+    Meant to be scheduled with Celery beat. The expired drafts are deleted
+    through the service in batches, until none are left. Drafts which fail
+    to be deleted are left out of the next batches, so that they don't hold
+    back the other expired drafts. Does nothing unless the ``draft_expiry``
+    of the service is configured.
+
+    :param int batch_size: maximum number of drafts deleted per batch.
+    """
+    service = current_service_registry.get("records")
+    failed = set()
+    while True:
+        result = service.delete_expired_drafts(
+            system_identity, limit=batch_size, exclude=failed)
+        current_app.logger.info(
+            "Expire drafts: deleted %s drafts (%s errors).",
+            len(result.items), len(result.errors)
+        )
+        failed.update(id_ for id_, _ in result.errors)
+        if len(result) < batch_size:
+            return
+
+
+@shared_task(bind=True, ignore_result=True, acks_late=True,
+             reject_on_worker_lost=True, max_retries=5,
+             default_retry_delay=60)
+def rebuild_index_shard(self, service_id, lower=None, upper=None, after=None,
+                        draft=False):
+    """Reindex a shard (i.e. an id range) of the records or drafts.
+
+    Each execution indexes one chunk of the shard and then enqueues the task
+    again for the next chunk, passing along the id of the last indexed
+    record. The progress of a shard is thus kept in the task message. If the
+    worker is lost, the message is requeued, and if the chunk fails (e.g.
+    because the search cluster is down), the task is retried from the same
+    cursor. Once the retries are exhausted, the shard bounds and cursor are
+    logged, so that the rest of the shard can be resubmitted. Records of a
+    chunk which fail to be indexed are logged with their id.
+
+    :param str service_id: id of the service in the service registry.
+    :param str lower: lower bound (inclusive) of the id range.
+    :param str upper: upper bound (exclusive) of the id range.
+    :param str after: id of the last record already reindexed.
+    :param bool draft: reindex the drafts instead of the records.
+    """
+    service = current_service_registry.get(service_id)
+    try:
+        last_id = service.rebuild_index_shard(
+            system_identity, lower=lower, upper=upper, after=after,
+            draft=draft)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            current_app.logger.exception(
+                "Reindexing of the %s shard [%s, %s) of service %s failed "
+                "after %s: resubmit it with this cursor.",
+                "drafts" if draft else "records", lower, upper, service_id,
+                after,
+            )
+            raise
+        raise self.retry(exc=exc)
+    if last_id is not None:
+        rebuild_index_shard.delay(
+            service_id,
+            lower=lower,
+            upper=upper,
+            after=str(last_id),
+            draft=draft,
+        )
+
+
+@shared_task(ignore_result=True)
+def process_bulk_queues(service_id, es_bulk_kwargs=None):
+    """Index the records and drafts of the bulk indexing queues of a service.
+
+    Consumes the queues filled by ``RecordService.rebuild_index()``. Meant to
+    be scheduled with Celery beat, like the ``process_bulk_queue`` task of
+    Invenio-Indexer (which consumes the default queue).
+
+    :param str service_id: id of the service in the service registry.
+    :param dict es_bulk_kwargs: passed to
+        :func:`elasticsearch:elasticsearch.helpers.bulk`.
+    """
+    service = current_service_registry.get(service_id)
+    service.process_bulk_queues(es_bulk_kwargs=es_bulk_kwargs)
+
+
+@shared_task(ignore_result=True)
+def index_records(service_id, record_ids=None, draft_ids=None):
+    """Index records and drafts with one bulk request per type.
+
+    :param str service_id: id of the service in the service registry.
+    :param list record_ids: ids of the records to index.
+    :param list draft_ids: ids of the drafts to index.
+    """
+    service = current_service_registry.get(service_id)
+    if record_ids:
+        bulk_index_records(
+            service.indexer, service.record_cls.get_records(record_ids))
+    if draft_ids:
+        bulk_index_records(
+            service.draft_indexer, service.draft_cls.get_records(draft_ids))
+
+
+@shared_task(ignore_result=True)
+def index_draft(service_id, draft_id, revision_id):
+    """Index a draft, unless it was updated since the task was sent.
+
+    Used for debounced indexing of drafts: each update sends a delayed task
+    with the revision id of the draft, and only the task for the latest
+    revision actually indexes the draft.
+
+    :param str service_id: id of the service in the service registry.
+    :param str draft_id: id of the draft.
+    :param int revision_id: revision of the draft when the task was sent.
+    """
+    service = current_service_registry.get(service_id)
+    try:
+        draft = service.draft_cls.get_record(draft_id)
+    except NoResultFound:
+        # The draft was deleted (e.g. published) in the meantime.
+        return
+    if draft.revision_id == revision_id:
+        service.indexer.index(draft)
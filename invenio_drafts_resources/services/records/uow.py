@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2022 CERN.
+#
+# Invenio-Drafts-Resources is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Unit of work operations for records and drafts."""
+
+from invenio_records_resources.services.uow import Operation, RecordCommitOp, \
+    RecordDeleteOp, RecordIndexOp, UnitOfWork
+
+from .indexer import bulk_delete_records, bulk_index_records
+from .tasks import index_draft
+
+
+def _merge_refresh(a, b):
+    """Merge two index refresh values (``True`` wins over ``"wait_for"``)."""
+    if a is True or b is True:
+        return True
+    return a or b
+
+
+def _indexer_key(indexer):
+    """Get what determines how an indexer indexes a record.
+
+    Indexers are usually created anew for each operation, so they are
+    compared by their type, client, dumper, index and version type instead.
+    """
+    return (
+        type(indexer),
+        indexer.client,
+        getattr(indexer, 'record_dumper', None),
+        indexer._record_to_index,
+        indexer._version_type,
+    )
+
+
+class RecordBulkIndexOp(Operation):
+    """Record indexing operation coalesced within the unit of work.
+
+    All operations of this type registered in a unit of work are merged into
+    the first one. The records are grouped by indexer (records registered with
+    different indexers are dumped differently), and deduplicated per indexer
+    by index and id (the last registered instance wins). Each group is indexed
+    with a single bulk request after the transaction commit.
+    """
+
+    def __init__(self, record, indexer=None, index_refresh=False):
+        """Initialize the record bulk index operation."""
+        self._index_refresh = index_refresh
+        self._indexers = {}
+        self._records = {}
+        if indexer is not None:
+            key = _indexer_key(indexer)
+            index = indexer.record_to_index(record)
+            self._indexers[key] = indexer
+            self._records[key] = {(index, record.id): record}
+
+    def on_register(self, uow):
+        """Merge the operation into the first one in the unit of work."""
+        for op in uow._operations:
+            if type(op) is type(self):
+                for key, records in self._records.items():
+                    op._indexers.setdefault(key, self._indexers[key])
+                    op._records.setdefault(key, {}).update(records)
+                op._index_refresh = _merge_refresh(
+                    op._index_refresh, self._index_refresh)
+                self._indexers = {}
+                self._records = {}
+                break
+
+    def on_commit(self, uow):
+        """Index the records with a single bulk request per indexer."""
+        arguments = {}
+        if self._index_refresh:
+            arguments["refresh"] = self._index_refresh
+        for key, records in self._records.items():
+            self._bulk(self._indexers[key], records.values(), **arguments)
+
+    def _bulk(self, indexer, records, **kwargs):
+        """Send the bulk request."""
+        bulk_index_records(indexer, records, **kwargs)
+
+
+class RecordBulkDeleteOp(RecordBulkIndexOp):
+    """Record index deletion operation coalesced within the unit of work.
+
+    Like ``RecordBulkIndexOp``, but deletes the records from the index.
+    Contrary to ``RecordDeleteOp``, the record itself is not deleted from
+    the database.
+    """
+
+    def _bulk(self, indexer, records, **kwargs):
+        """Send the bulk request."""
+        bulk_delete_records(indexer, records, **kwargs)
+
+
+class DebouncedIndexOp(Operation):
+    """Delayed indexing of a draft.
+
+    After the commit, a task is sent which indexes the draft after the given
+    countdown, unless the draft was updated again in the meantime (in which
+    case the update has sent its own task).
+    """
+
+    def __init__(self, service_id, draft, countdown):
+        """Initialize the debounced index operation."""
+        self._service_id = service_id
+        self._draft = draft
+        self._countdown = countdown
+
+    def on_post_commit(self, uow):
+        """Send the index task with the committed revision of the draft."""
+        index_draft.apply_async(
+            args=(self._service_id, str(self._draft.id),
+                  self._draft.revision_id),
+            countdown=self._countdown,
+        )
+
+
+class BulkUnitOfWork(UnitOfWork):
+    """Unit of work indexing all records with bulk requests.
+
+    Used by the bulk operations of the service. Record commit and delete
+    operations with an indexer are registered without it, and the records
+    are indexed (or deleted from the index) via ``RecordBulkIndexOp`` and
+    ``RecordBulkDeleteOp`` instead, with one bulk request per indexer.
+    Record index operations are replaced by a ``RecordBulkIndexOp`` only,
+    so the record is not committed.
+
+    Index refreshes requested by the operations are not done. Instead, the
+    indices to refresh are collected in ``refresh_indices``, so that the
+    caller can refresh them once all units of work are committed.
+
+    The rows prefetched for the items of the unit of work are kept in
+    ``prefetched`` (by record/draft class and PID value). Holding them also
+    keeps the prefetched instances in the identity map of the session.
+    """
+
+    def __init__(self, session=None, prefetched=None):
+        """Initialize the unit of work."""
+        super().__init__(session=session)
+        self.refresh_indices = set()
+        self.prefetched = prefetched or {}
+        self.committed = False
+
+    def commit(self):
+        """Commit the unit of work.
+
+        ``committed`` is set once the database transaction is committed, so
+        that a failure of the transaction can be told apart from a failure of
+        the commit operations (e.g. indexing).
+        """
+        self.session.commit()
+        self.committed = True
+        # Run commit operations
+        for op in self._operations:
+            op.on_commit(self)
+        # Run post commit operations
+        for op in self._operations:
+            op.on_post_commit(self)
+        self._mark_dirty()
+
+    def register(self, op):
+        """Register an operation."""
+        if isinstance(op, RecordIndexOp) and op._indexer is not None:
+            # Index only, without committing the record
+            op = RecordBulkIndexOp(
+                op._record,
+                indexer=op._indexer,
+                index_refresh=op._index_refresh,
+            )
+        elif type(op) is RecordCommitOp and op._indexer is not None:
+            super().register(RecordCommitOp(op._record))
+            op = RecordBulkIndexOp(
+                op._record,
+                indexer=op._indexer,
+                index_refresh=op._index_refresh,
+            )
+        elif isinstance(op, RecordDeleteOp) and op._indexer is not None:
+            super().register(RecordDeleteOp(op._record, force=op._force))
+            op = RecordBulkDeleteOp(
+                op._record,
+                indexer=op._indexer,
+                index_refresh=op._index_refresh,
+            )
+        if isinstance(op, RecordBulkIndexOp) and op._index_refresh:
+            for key, records in op._records.items():
+                indexer = op._indexers[key]
+                for index, _ in records:
+                    self.refresh_indices.add(
+                        indexer._prepare_index(*index)[0])
+            op._index_refresh = False
+        super().register(op)
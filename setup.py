@@ -61,6 +61,8 @@ setup_requires = [
 
 install_requires = [
     "invenio-records-resources>=0.19.6,<0.20.0",
+    "jsonpatch>=1.26",
+    "jsonpointer>=2.0",
 ]
 
 packages = find_packages()
@@ -8,6 +8,8 @@
 
 """Data access layer tests."""
 
+from datetime import timedelta
+
 import pytest
 from invenio_search import current_search_client
 from jsonschema import ValidationError
@@ -15,6 +17,7 @@ from mock_module.api import Draft, ParentRecord, Record
 from mock_module.models import DraftMetadata, ParentRecordMetadata, \
     ParentState, RecordMetadata
 from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 
@@ -67,6 +70,8 @@ def test_draft_create_parent_state(app, db, location):
         assert d.versions.latest_id is None
         assert d.versions.latest_index is None
         assert d.versions.next_draft_id == d.id
+        assert d.versions.published_count == 0
+        assert d.versions.draft_count == 1
 
     assert_state(draft)
     assert_state(Draft.get_record(draft.id))
@@ -86,6 +91,8 @@ def test_record_create_parent_state(app, db, location):
         assert r.versions.latest_id == r.id
         assert r.versions.latest_index == 1
         assert r.versions.next_draft_id is None
+        assert r.versions.published_count == 1
+        assert r.versions.draft_count == 0
         assert r.versions.index == 1
         assert r.versions.is_latest is True
         assert r.versions.is_latest_draft is True
@@ -96,6 +103,63 @@ def test_record_create_parent_state(app, db, location):
     assert_state(Record.get_record(record.id))
 
 
+def test_versions_state_counters(app, db, location):
+    """Test the version counters computed from the versions state."""
+    record = Record.publish(Draft.create({}))
+    db.session.commit()
+
+    draft = Draft.new_version(record)
+    db.session.commit()
+    assert draft.versions.published_count == 1
+    assert draft.versions.draft_count == 1
+
+    # Discarding the draft of the new version
+    draft.delete(force=True)
+    db.session.commit()
+    record.versions.state(refresh=True)
+    assert record.versions.draft_count == 0
+
+    draft = Draft.new_version(record)
+    record = Record.publish(draft)
+    db.session.commit()
+    record.versions.state(refresh=True)
+    assert record.versions.published_count == 2
+    assert record.versions.draft_count == 0
+    # The counters are not part of the indexed versions state
+    assert "published_count" not in record.versions.dump()
+
+
+def test_versions_state_shared(app, db, location):
+    """Test that the versions state is shared by records of a parent."""
+    draft = Draft.create({})
+    db.session.commit()
+
+    draft_a = Draft.get_record(draft.id)
+    draft_b = Draft.get_record(draft.id)
+    assert draft_a.versions.state() is draft_b.versions.state()
+
+    draft_a.versions.clear_next()
+    assert draft_b.versions.next_draft_id is None
+
+
+def test_parent_shared(app, db, location):
+    """Test that the parent record is shared by records of a parent."""
+    record = Record.publish(Draft.create({}))
+    db.session.commit()
+    draft = Draft.new_version(record)
+    draft.commit()
+    db.session.commit()
+
+    record = Record.get_record(record.id)
+    draft = Draft.get_record(draft.id)
+    assert record.parent.model is draft.parent.model
+
+    # The siblings share the given parent instance
+    parent = record.parent
+    records = Record.get_records_by_parent(parent)
+    assert all(r.parent is parent for r in records)
+
+
 def test_draft_create_new_version(app, db, location):
     """Test draft creation of the parent record."""
     # A published record.
@@ -117,6 +181,56 @@ def test_draft_create_new_version(app, db, location):
     assert record.versions.is_latest is True
 
 
+def test_get_latest_id(app, db, location):
+    """Test resolving the latest version from a PID value."""
+    draft = Draft.create({})
+    draft.commit()
+    record = Record.publish(draft)
+    record.register()
+    record.commit()
+    db.session.commit()
+
+    # A registered PID resolves to the latest version.
+    assert Record.get_latest_id(record.pid.pid_value) == record.id
+
+    # An unknown or unregistered PID doesn't resolve.
+    assert Record.get_latest_id('unknown') is None
+    draft = Draft.new_version(record)
+    draft.commit()
+    db.session.commit()
+    assert Record.get_latest_id(draft.pid.pid_value) is None
+
+
+def test_prefetch(app, db, location):
+    """Test loading records with their parents and versions states."""
+    draft = Draft.create({})
+    draft.commit()
+    record = Record.publish(draft)
+    record.register()
+    record.commit()
+    db.session.commit()
+
+    rows = Record.prefetch([record.pid.pid_value, 'unknown'])
+    assert len(rows) == 1
+    pid, model, parent_model, state = rows[0]
+    assert pid.pid_value == record.pid.pid_value
+    assert model.id == record.id
+    assert parent_model.id == record.parent.id
+    assert state.latest_id == record.id
+
+
+def test_parent_index_unique(app, db, location):
+    """Test that the version index is unique per parent."""
+    record = Record.publish(Draft.create({}))
+    db.session.commit()
+
+    record = Record.create({}, parent=record.parent)
+    record.model.index = 1
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
 def test_draft_parent_state_hard_delete(app, db, location):
     """Test force deletion of a draft."""
     # Initial state: Only draft exists (i.e. no other record versions)
@@ -175,6 +289,23 @@ def test_draft_parent_state_soft_delete(app, db, location):
     assert record.versions.latest_id == record.id
 
 
+def test_cleanup_drafts(app, db, location):
+    """Test hard deletion of soft-deleted drafts in batches."""
+    drafts = [Draft.create({}) for i in range(3)]
+    db.session.commit()
+    for draft in drafts:
+        draft.delete()
+    db.session.commit()
+
+    assert Draft.cleanup_drafts(timedelta(seconds=0), batch_size=2) == 3
+    db.session.commit()
+
+    assert DraftMetadata.query.count() == 0
+    assert ParentState.query.count() == 3
+    assert ParentState.query.filter(
+        ParentState.next_draft_id.isnot(None)).count() == 0
+
+
 #
 # Create/Update from draft
 #
@@ -355,3 +486,21 @@ def test_get_records_by_parent(app, db, location):
     records = Record.get_records_by_parent(parent)
     assert len(records) == 2
     assert id(parent) == id(records[0].parent) == id(records[1].parent)
+    # The versions state is shared by all siblings.
+    assert records[0].versions.state() is records[1].versions.state()
+
+
+#
+# Iterate ids
+#
+def test_iter_ids(app, db, location):
+    """Test iterating over the ids in chunks."""
+    drafts = [Draft.create({}) for i in range(5)]
+    db.session.commit()
+    drafts[0].delete()
+    db.session.commit()
+
+    expected = sorted(d.id for d in drafts[1:])
+    assert list(Draft.iter_ids(chunk_size=2)) == expected
+    assert list(Draft.iter_ids(chunk_size=10)) == expected
+    assert len(list(Draft.iter_ids(include_deleted=True))) == 5
@@ -46,6 +46,31 @@ def test_read_draft(client, headers, input_data, location, es_clear):
 
     _assert_single_item_response(response)
 
+    # Conditional request with the ETag of the current revision
+    etag = response.headers["ETag"]
+    response = client.get(
+        f"/mocks/{recid}/draft",
+        headers={**headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+
+    # Weak ETags, lists of ETags and "*" match as well
+    for if_none_match in (f"W/{etag}", f'"0", {etag}', "*"):
+        response = client.get(
+            f"/mocks/{recid}/draft",
+            headers={**headers, "If-None-Match": if_none_match},
+        )
+        assert response.status_code == 304
+
+    # A stale ETag returns the draft
+    response = client.get(
+        f"/mocks/{recid}/draft",
+        headers={**headers, "If-None-Match": '"0"'},
+    )
+    assert response.status_code == 200
+
 
 def test_update_draft(client, headers, input_data, location, es_clear):
     response = client.post("/mocks", json=input_data, headers=headers)
@@ -79,6 +104,36 @@ def test_update_draft(client, headers, input_data, location, es_clear):
     assert update_response.json["id"] == recid
 
 
+def test_patch_draft(client, headers, input_data, location, es_clear):
+    response = client.post("/mocks", json=input_data, headers=headers)
+    assert response.status_code == 201
+    recid = response.json['id']
+
+    response = client.patch(
+        f"/mocks/{recid}/draft",
+        json=[{"op": "replace", "path": "/metadata/title", "value": "A"}],
+        headers={**headers, "content-type": "application/json-patch+json"},
+    )
+    assert response.status_code == 200
+    assert response.json["metadata"]['title'] == "A"
+
+    response = client.patch(
+        f"/mocks/{recid}/draft",
+        json={"metadata": {"title": "B"}},
+        headers={**headers, "content-type": "application/merge-patch+json"},
+    )
+    assert response.status_code == 200
+    assert response.json["metadata"]['title'] == "B"
+
+    # The patch format must be given by the content type
+    response = client.patch(
+        f"/mocks/{recid}/draft",
+        json={"metadata": {"title": "C"}},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
 def test_delete_draft(client, headers, input_data, location, es_clear):
     response = client.post("/mocks", json=input_data, headers=headers)
 
@@ -135,6 +190,34 @@ def test_publish_draft(client, headers, input_data, location, es_clear):
     _assert_single_item_response(response)
 
 
+def test_publish_many(client, headers, input_data, location, es_clear):
+    """Test bulk publication of drafts."""
+    response = client.post("/mocks", json=input_data, headers=headers)
+    recid = response.json['id']
+
+    response = client.post(
+        "/mocks/actions/publish",
+        json={"ids": [recid, "unknown"]},
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.json["hits"]["total"] == 2
+    assert response.json["errors"] == 1
+    assert response.json["hits"]["hits"][0] == \
+        {"id": recid, "status": "success"}
+    assert response.json["hits"]["hits"][1]["status"] == "error"
+
+    response = client.get(f"/mocks/{recid}", headers=headers)
+    assert response.status_code == 200
+
+    # Invalid bodies
+    for body in [{"ids": "abc"}, {}, ["abc"]]:
+        response = client.post(
+            "/mocks/actions/publish", json=body, headers=headers)
+        assert response.status_code == 400
+
+
 def test_search_versions(client, headers, input_data, location, es_clear):
     """Test search for versions."""
     recid = _create_and_publish(client, headers, input_data)
@@ -263,3 +346,16 @@ def test_redirect_to_latest_version(client, headers, input_data, location):
 
     assert response.status_code == 301
     assert response.headers["location"] == latest_version_self_link
+
+    # The redirect can be revalidated with its ETag
+    etag = response.headers["ETag"]
+    response = client.get(
+        f"/mocks/{recid}/versions/latest", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    # Weak comparison is used (e.g. for ETags weakened by a proxy)
+    response = client.get(
+        f"/mocks/{recid}/versions/latest",
+        headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
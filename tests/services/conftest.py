@@ -27,6 +27,14 @@ def service():
     return RecordService(ServiceConfig)
 
 
+@pytest.fixture(scope="module")
+def base_app(base_app, service):
+    """Application factory fixture."""
+    registry = base_app.extensions['invenio-records-resources'].registry
+    registry.register(service, service_id='records')
+    yield base_app
+
+
 @pytest.fixture(scope="module")
 def file_service():
     """File service fixture."""
@@ -15,16 +15,27 @@ Test to add:
 - Read with missing pid
 """
 
+import uuid
 from io import BytesIO
+from unittest.mock import MagicMock
 
 import pytest
 from invenio_db import db
 from invenio_files_rest.errors import InvalidOperationError
 from invenio_pidstore.errors import PIDDoesNotExistError, PIDUnregistered
 from invenio_pidstore.models import PIDStatus
+from invenio_records_resources.services.errors import PermissionDeniedError
 from marshmallow.exceptions import ValidationError
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
+from invenio_drafts_resources.services.records import uow
+from invenio_drafts_resources.services.records.patch import JSON_PATCH, \
+    MERGE_PATCH, apply_patch
+from invenio_drafts_resources.services.records.service import _shard_bounds
+from invenio_drafts_resources.services.records.uow import BulkUnitOfWork
+
 from .utils import create_and_publish
 
 #
@@ -95,6 +106,60 @@ def test_update_draft(app, service, identity_simple, input_data):
     assert update_draft["metadata"]['title'] == edited_title
 
 
+def test_update_draft_unchanged(app, service, identity_simple, input_data):
+    draft = service.create(identity_simple, input_data)
+    draft = service.update_draft(identity_simple, draft.id, input_data)
+    revision_id = draft._record.revision_id
+
+    # Saving the same data again doesn't create a new revision
+    draft = service.update_draft(identity_simple, draft.id, input_data)
+    assert draft._record.revision_id == revision_id
+    draft = service.read_draft(identity_simple, draft.id)
+    assert draft._record.revision_id == revision_id
+
+
+def test_patch_draft(app, service, identity_simple, input_data):
+    draft = service.create(identity_simple, input_data)
+
+    # JSON Patch
+    draft = service.patch_draft(identity_simple, draft.id, [
+        {"op": "replace", "path": "/metadata/title", "value": "Patched"},
+    ], JSON_PATCH)
+    assert draft["metadata"]["title"] == "Patched"
+
+    # JSON Merge Patch
+    draft = service.patch_draft(
+        identity_simple, draft.id, {"metadata": {"title": "Merged"}},
+        MERGE_PATCH)
+    assert draft["metadata"]["title"] == "Merged"
+
+    # Check the updates where saved
+    draft = service.read_draft(identity_simple, draft.id)
+    assert draft["metadata"]["title"] == "Merged"
+
+    # A patch that can't be applied
+    with pytest.raises(ValidationError):
+        service.patch_draft(identity_simple, draft.id, [
+            {"op": "remove", "path": "/metadata/unknown"},
+        ], JSON_PATCH)
+
+    # The patch format is given by the content type, not by the patch
+    with pytest.raises(ValidationError):
+        service.patch_draft(
+            identity_simple, draft.id, {"metadata": {}}, JSON_PATCH)
+    with pytest.raises(ValidationError):
+        service.patch_draft(
+            identity_simple, draft.id, {"metadata": {}}, "application/json")
+
+
+def test_merge_patch():
+    # A merge patch with an array root replaces the document
+    assert apply_patch({"a": 1}, [1, 2], MERGE_PATCH) == [1, 2]
+    assert apply_patch(
+        {"a": {"b": 1, "c": 2}}, {"a": {"b": None}}, MERGE_PATCH
+    ) == {"a": {"c": 2}}
+
+
 def test_update_draft_invalid_field(app, service, identity_simple, input_data):
     """Update with invalid field reports rather than raises errors."""
     draft = service.create(identity_simple, input_data)
@@ -122,6 +187,37 @@ def test_delete_draft(app, service, identity_simple, input_data):
         service.read_draft(identity_simple, draft.id)
 
 
+def test_delete_draft_wait_for_refresh(
+        app, service, identity_simple, input_data, monkeypatch):
+    monkeypatch.setattr(
+        service.config, 'delete_draft_index_refresh', 'wait_for')
+    draft = service.create(identity_simple, input_data)
+    service.draft_cls.index.refresh()
+
+    assert service.delete_draft(identity_simple, draft.id)
+
+    # The deleted draft is not returned by a search run right after
+    res = service.search_drafts(identity_simple, q=f"id:{draft.id}")
+    assert res.total == 0
+
+
+def test_delete_drafts_many(app, service, identity_simple, input_data):
+    ids = [service.create(identity_simple, input_data).id for i in range(2)]
+    published = create_and_publish(service, identity_simple, input_data)
+    ids.append(service.edit(identity_simple, published.id).id)
+
+    result = service.delete_drafts_many(identity_simple, ids + ['unknown'])
+
+    assert len(result) == 4
+    assert [id_ for id_, error in result.errors] == ['unknown']
+    for id_ in ids:
+        with pytest.raises((PIDDoesNotExistError, NoResultFound)):
+            service.read_draft(identity_simple, id_)
+    # The indices were refreshed
+    res = service.search_drafts(identity_simple, q=f"id:({' OR '.join(ids)})")
+    assert res.total == 0
+
+
 def test_publish_draft(app, service, identity_simple, input_data):
     """Test draft publishing of a non-existing record.
 
@@ -151,6 +247,71 @@ def test_publish_draft(app, service, identity_simple, input_data):
         assert record[key] == value
 
 
+def test_create_many(app, service, identity_simple, input_data):
+    result = service.create_many(identity_simple, [input_data] * 3)
+
+    assert len(result) == 3
+    assert not result.errors
+    parents = set()
+    for item in result.items:
+        draft = service.read_draft(identity_simple, item.id)
+        assert draft["metadata"] == input_data["metadata"]
+        parents.add(draft._record.parent.id)
+    assert len(parents) == 3
+
+    service.draft_cls.index.refresh()
+    ids = " OR ".join(item.id for item in result.items)
+    res = service.search_drafts(identity_simple, q=f"id:({ids})")
+    assert res.total == 3
+
+
+def test_publish_many(app, service, identity_simple, input_data, monkeypatch):
+    monkeypatch.setattr(service.config, 'bulk_chunk_size', 2)
+    ids = [service.create(identity_simple, input_data).id for i in range(3)]
+
+    # An unknown id fails its chunk, which is then retried item by item.
+    result = service.publish_many(identity_simple, ids + ['unknown'])
+
+    assert len(result) == 4
+    assert [item.id for item in result.items] == ids
+    assert [id_ for id_, error in result.errors] == ['unknown']
+    for id_ in ids:
+        record = service.read(identity_simple, id_)
+        assert record._record.pid.status == PIDStatus.REGISTERED
+
+
+def test_publish_many_commit_errors(
+        app, service, identity_simple, input_data, monkeypatch):
+    """Failures when committing a chunk are reported per item."""
+    ids = [service.create(identity_simple, input_data).id for i in range(2)]
+
+    # A failed transaction is rolled back and retried item by item
+    commit = db.session.commit
+    calls = []
+
+    def fail_first_commit():
+        calls.append(True)
+        if len(calls) == 1:
+            raise IntegrityError("INSERT", {}, Exception())
+        commit()
+
+    monkeypatch.setattr(db.session, "commit", fail_first_commit)
+    result = service.publish_many(identity_simple, ids)
+    monkeypatch.undo()
+    assert [item.id for item in result.items] == ids
+    assert result.errors == []
+
+    # Failed indexing is reported, while the records stay published
+    ids = [service.create(identity_simple, input_data).id for i in range(2)]
+    error = RuntimeError("Indexing failed")
+    monkeypatch.setattr(
+        uow, "bulk_index_records", MagicMock(side_effect=error))
+    result = service.publish_many(identity_simple, ids)
+    assert result.errors == [(id_, error) for id_ in ids]
+    for id_ in ids:
+        assert service.read(identity_simple, id_)
+
+
 def test_fail_to_publish_invalid_draft(app, service, identity_simple):
     """Publishing an incomplete draft should fail.
 
@@ -284,6 +445,66 @@ def test_create_publish_new_version(app, service, identity_simple,
     assert record_2['id'] != record['id']
 
 
+def test_new_version_many(app, service, identity_simple, input_data):
+    ids = [
+        create_and_publish(service, identity_simple, input_data).id
+        for i in range(2)
+    ]
+
+    result = service.new_version_many(identity_simple, ids + ['unknown'])
+
+    assert len(result) == 3
+    assert [id_ for id_, error in result.errors] == ['unknown']
+    for id_, draft in zip(ids, result.items):
+        record = service.read(identity_simple, id_)
+        assert draft._record.parent.id == record._record.parent.id
+        assert draft._record.versions.index == 2
+        assert draft._record.versions.latest_id == record._record.id
+
+
+def test_edit_many(app, service, identity_simple, input_data):
+    ids = [
+        create_and_publish(service, identity_simple, input_data).id
+        for i in range(2)
+    ]
+
+    result = service.edit_many(identity_simple, ids + ['unknown'])
+
+    assert len(result) == 3
+    assert [id_ for id_, error in result.errors] == ['unknown']
+    assert [draft.id for draft in result.items] == ids
+    for draft in result.items:
+        assert draft._record.is_draft
+        # The soft-deleted draft was reused
+        assert draft._record.revision_id > 1
+
+
+def test_resolve_prefetched(app, service, identity_simple, input_data):
+    """Prefetched records are resolved without any query."""
+    record = create_and_publish(service, identity_simple, input_data)
+    prefetched = {service.record_cls: {
+        row[0].pid_value: row
+        for row in service.record_cls.prefetch([record.id])
+    }}
+    uow_ = BulkUnitOfWork(db.session, prefetched=prefetched)
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        resolved = service._resolve(service.record_cls, record.id, uow=uow_)
+        assert resolved.parent.id == record._record.parent.id
+        assert resolved.versions.latest_id == record._record.id
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    assert resolved.id == record._record.id
+    assert statements == []
+
+
 def test_read_latest_version(app, service, identity_simple, input_data):
     """Test read the latest version of a record.
 
@@ -309,6 +530,63 @@ def test_read_latest_version(app, service, identity_simple, input_data):
     assert latest['id'] == recid_2
 
 
+def test_list_versions(app, service, identity_simple, input_data):
+    """Test listing the versions of a record from the database."""
+    record = create_and_publish(service, identity_simple, input_data)
+    ids = [record.id]
+    input_data["files"] = {"enabled": False}
+    for i in range(2):
+        draft = service.new_version(identity_simple, ids[-1])
+        draft = service.update_draft(identity_simple, draft.id, input_data)
+        ids.append(service.publish(identity_simple, draft.id).id)
+    # An unpublished version is not listed
+    draft = service.new_version(identity_simple, ids[-1])
+
+    result = service.list_versions(identity_simple, draft.id, size=2)
+    assert [hit["id"] for hit in result] == ids[:2]
+    assert result.next_after == 2
+
+    result = service.list_versions(
+        identity_simple, ids[0], size=2, after=result.next_after)
+    assert [hit["id"] for hit in result] == ids[2:]
+    assert result.to_dict()["next_after"] is None
+
+
+def test_list_versions_permissions(
+        app, service, identity_simple, input_data, monkeypatch):
+    """Versions the identity cannot read are skipped."""
+    record = create_and_publish(service, identity_simple, input_data)
+    ids = [record.id]
+    input_data["files"] = {"enabled": False}
+    for i in range(3):
+        draft = service.new_version(identity_simple, ids[-1])
+        draft = service.update_draft(identity_simple, draft.id, input_data)
+        ids.append(service.publish(identity_simple, draft.id).id)
+
+    check_permission = service.check_permission
+
+    def deny_second(identity, action_name, record=None, **kwargs):
+        if action_name == "read" and record.get("id") == ids[1]:
+            return False
+        return check_permission(
+            identity, action_name, record=record, **kwargs)
+
+    monkeypatch.setattr(service, "check_permission", deny_second)
+
+    result = service.list_versions(identity_simple, ids[0], size=2)
+    assert [hit["id"] for hit in result] == [ids[0], ids[2]]
+    assert result.next_after == 3
+
+    result = service.list_versions(
+        identity_simple, ids[0], size=2, after=result.next_after)
+    assert [hit["id"] for hit in result] == ids[3:]
+    assert result.next_after is None
+
+    # The record itself must be readable
+    with pytest.raises(PermissionDeniedError):
+        service.list_versions(identity_simple, ids[1])
+
+
 def test_reindexing_all_siblings(app, service, identity_simple, input_data):
     """Test if reindexing sibling records includes drafts."""
     record = create_and_publish(service, identity_simple, input_data)._obj
@@ -340,3 +618,76 @@ def test_reindexing_all_siblings(app, service, identity_simple, input_data):
     ]
     assert hits
     assert hits[0]["metadata"]["title"] == draft.metadata["title"]
+
+
+def test_rebuild_index(app, service, identity_simple, input_data):
+    """Test that a rebuilt index contains all records and drafts."""
+    record = create_and_publish(service, identity_simple, input_data)
+    draft = service.create(identity_simple, input_data)
+    service.indexer.delete(record._record)
+    service.draft_indexer.delete(draft._record)
+    service.record_cls.index.refresh()
+    service.draft_cls.index.refresh()
+    q = f"id:({record.id} OR {draft.id})"
+    assert service.search(identity_simple, q=q).total == 0
+    assert service.search_drafts(identity_simple, q=q).total == 0
+
+    service.rebuild_index(identity_simple)
+    assert service.process_bulk_queues() > 0
+
+    service.record_cls.index.refresh()
+    service.draft_cls.index.refresh()
+    assert [hit["id"] for hit in service.search(identity_simple, q=q)] == \
+        [record.id]
+    assert [
+        hit["id"] for hit in service.search_drafts(identity_simple, q=q)
+    ] == [draft.id]
+
+
+def test_rebuild_index_shards(app, service, identity_simple, input_data):
+    """Test that a sharded rebuild covers all records and drafts."""
+    record = create_and_publish(service, identity_simple, input_data)
+    draft = service.create(identity_simple, input_data)
+    service.indexer.delete(record._record)
+    service.draft_indexer.delete(draft._record)
+
+    # With eager tasks, the shards are reindexed right away
+    service.rebuild_index(identity_simple, shards=3)
+
+    service.record_cls.index.refresh()
+    service.draft_cls.index.refresh()
+    q = f"id:({record.id} OR {draft.id})"
+    assert service.search(identity_simple, q=q).total == 1
+    assert service.search_drafts(identity_simple, q=q).total == 1
+
+
+def test_rebuild_index_shard_after(app, service, identity_simple, input_data,
+                                   monkeypatch):
+    """Test reindexing a shard chunk by chunk."""
+    monkeypatch.setattr(service.config, 'rebuild_index_chunk_size', 2)
+    ids = sorted(
+        service.create(identity_simple, input_data)._record.id
+        for i in range(3)
+    )
+    last_id = service.rebuild_index_shard(
+        identity_simple, lower=ids[0], draft=True)
+    assert last_id == ids[1]
+    assert service.rebuild_index_shard(
+        identity_simple, lower=ids[0], after=last_id, draft=True) is None
+
+
+def test_shard_bounds():
+    """Test that the shards cover the UUID space without overlapping."""
+    bounds = _shard_bounds(3)
+    assert len(bounds) == 3
+    assert bounds[0][0] == uuid.UUID(int=0)
+    assert bounds[-1][1] is None
+    for (_, upper), (lower, _) in zip(bounds, bounds[1:]):
+        assert upper == lower
+
+    for id_ in [uuid.UUID(int=0), uuid.UUID(int=2**128 - 1)] + \
+            [uuid.uuid4() for i in range(100)]:
+        assert len([
+            (lower, upper) for lower, upper in bounds
+            if lower <= id_ and (upper is None or id_ < upper)
+        ]) == 1
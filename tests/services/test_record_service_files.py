@@ -27,6 +27,7 @@ from mock_module.models import DraftMetadata, FileDraftMetadata, \
 from mock_module.service import ServiceConfig
 
 from invenio_drafts_resources.services import RecordService
+from invenio_drafts_resources.services.records import uow
 
 
 #
@@ -145,6 +146,7 @@ def test_edit_delete(
     # Elasticsearch will complain if we try we don't wait a minute, so disable
     # the indexer.
     monkeypatch.setattr(service.config, 'indexer_cls', MagicMock())
+    monkeypatch.setattr(uow, 'bulk_index_records', MagicMock())
 
     # Edit draft (when no soft-deleted draft record exists)
     draft = service.edit(identity_simple, record.id)
@@ -182,6 +184,7 @@ def test_edit_publish(
     # Elasticsearch will complain if we try we don't wait a minute, so disable
     # the indexer.
     monkeypatch.setattr(service.config, 'indexer_cls', MagicMock())
+    monkeypatch.setattr(uow, 'bulk_index_records', MagicMock())
 
     # Edit
     draft = service.edit(identity_simple, record.id)
@@ -402,3 +405,18 @@ def test_fail_to_add_files_to_draft_with_files_disabled(
     with pytest.raises(InvalidOperationError):
         add_file_to_draft(
             service.draft_files, draft.id, "file.txt", identity_simple)
+
+
+def test_update_draft_files_enabled(app, service, identity_simple,
+                                    input_data):
+    """Toggling files.enabled is saved, although only files changed."""
+    draft = service.create(identity_simple, input_data)
+    revision_id = draft._record.revision_id
+
+    input_data['files']['enabled'] = False
+    draft = service.update_draft(identity_simple, draft.id, input_data)
+    assert draft['files']['enabled'] is False
+    assert draft._record.revision_id > revision_id
+
+    draft = service.read_draft(identity_simple, draft.id)
+    assert draft['files']['enabled'] is False
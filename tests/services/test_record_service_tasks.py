@@ -8,9 +8,13 @@
 
 """Service tasks tests."""
 
+from datetime import datetime, timedelta
+
 import pytest
+from invenio_db import db
 
-from invenio_drafts_resources.services.records.tasks import cleanup_drafts
+from invenio_drafts_resources.services.records.tasks import cleanup_drafts, \
+    expire_drafts, index_draft, rebuild_index_shard
 
 
 #
@@ -23,14 +27,6 @@ def input_data(input_data):
     return input_data
 
 
-@pytest.fixture(scope="module")
-def base_app(base_app, service):
-    """Application factory fixture."""
-    registry = base_app.extensions['invenio-records-resources'].registry
-    registry.register(service, service_id='records')
-    yield base_app
-
-
 def test_hard_delete_soft_deleted_task(
     app, service, identity_simple, input_data
 ):
@@ -46,3 +42,152 @@ def test_hard_delete_soft_deleted_task(
     assert len(draft_model.query.filter(
         draft_model.is_deleted == True  # noqa
     ).all()) == 0
+
+
+def test_rebuild_index_shard_task(
+    app, service, identity_simple, input_data
+):
+    draft = service.create(identity_simple, input_data)
+    service.draft_indexer.delete(draft._record)
+    service.draft_cls.index.refresh()
+    assert service.search_drafts(identity_simple).total == 0
+
+    rebuild_index_shard("records", draft=True)
+
+    service.draft_cls.index.refresh()
+    assert service.search_drafts(identity_simple).total == 1
+
+
+def test_rebuild_index_shard_task_chunks(
+    app, service, identity_simple, input_data, monkeypatch
+):
+    monkeypatch.setattr(service.config, 'rebuild_index_chunk_size', 1)
+    ids = [service.create(identity_simple, input_data).id for i in range(3)]
+    for id_ in ids:
+        service.draft_indexer.delete(
+            service.read_draft(identity_simple, id_)._record)
+    service.draft_cls.index.refresh()
+    q = f"id:({' OR '.join(ids)})"
+    assert service.search_drafts(identity_simple, q=q).total == 0
+
+    # With eager tasks, the task re-enqueued with ``after`` runs right away
+    rebuild_index_shard("records", draft=True)
+
+    service.draft_cls.index.refresh()
+    assert service.search_drafts(identity_simple, q=q).total == 3
+
+
+def test_rebuild_index_shard_task_retry(
+    app, service, identity_simple, monkeypatch
+):
+    calls = []
+
+    def rebuild_index_shard_(identity, **kwargs):
+        calls.append(kwargs["after"])
+        if len(calls) < 3:
+            raise ConnectionError()
+        return None
+
+    monkeypatch.setattr(
+        service, 'rebuild_index_shard', rebuild_index_shard_)
+
+    # With eager tasks, the retries run right away
+    rebuild_index_shard.delay("records", after="cursor")
+
+    # The chunk is retried from the same cursor
+    assert calls == ["cursor"] * 3
+
+
+def test_hard_delete_soft_deleted_task_batches(
+    app, service, identity_simple, input_data
+):
+    for i in range(3):
+        draft = service.create(identity_simple, input_data)
+        service.publish(identity_simple, draft.id)
+    draft_model = service.draft_cls.model_cls
+
+    assert len(draft_model.query.filter(
+        draft_model.is_deleted == True  # noqa
+    ).all()) == 3
+    cleanup_drafts(seconds=0, batch_size=2)
+
+    assert len(draft_model.query.filter(
+        draft_model.is_deleted == True  # noqa
+    ).all()) == 0
+
+
+def test_debounced_draft_indexing(
+    app, service, identity_simple, input_data, monkeypatch
+):
+    monkeypatch.setattr(service.config, 'draft_index_debounce', 5)
+    draft = service.create(identity_simple, input_data)
+    input_data['metadata']['title'] = 'Debounced'
+    # With eager tasks, the delayed indexing runs right away
+    draft = service.update_draft(identity_simple, draft.id, input_data)
+
+    service.draft_cls.index.refresh()
+    res = service.search_drafts(identity_simple, q=f"id:{draft.id}")
+    assert list(res.hits)[0]['metadata']['title'] == 'Debounced'
+
+    # A task for an older revision doesn't index the draft
+    service.draft_indexer.delete(draft._record)
+    index_draft(
+        "records", str(draft._record.id), draft._record.revision_id - 1)
+    service.draft_cls.index.refresh()
+    assert service.search_drafts(identity_simple).total == 0
+
+
+def test_expire_drafts_task(
+    app, service, identity_simple, input_data, monkeypatch
+):
+    # Drafts don't expire by default
+    draft = service.create(identity_simple, input_data)
+    expire_drafts()
+    assert service.read_draft(identity_simple, draft.id)
+
+    monkeypatch.setattr(
+        service.config, 'draft_expiry', timedelta(seconds=0))
+    kept = service.create(identity_simple, input_data)
+    # Activity extends the expiry date
+    monkeypatch.setattr(service.config, 'draft_expiry', timedelta(days=1))
+    revision_id = kept._record.revision_id
+    extended = service.extend_draft_expiry(identity_simple, kept.id)
+    # Extending the expiry date doesn't bump the revision
+    assert extended._record.revision_id == revision_id
+    draft_model = service.draft_cls.model_cls
+    db.session.expire_all()
+    model = draft_model.query.get(kept._record.id)
+    assert model.version_id == revision_id + 1
+    assert model.expires_at > datetime.utcnow()
+    monkeypatch.setattr(
+        service.config, 'draft_expiry', timedelta(seconds=0))
+
+    expire_drafts(batch_size=1)
+
+    assert service.read_draft(identity_simple, kept.id)
+    assert draft_model.query.filter_by(id=draft._record.id).count() == 0
+
+
+def test_expire_drafts_task_failures(
+    app, service, identity_simple, input_data, monkeypatch
+):
+    monkeypatch.setattr(
+        service.config, 'draft_expiry', timedelta(seconds=0))
+    failing = service.create(identity_simple, input_data)
+    draft = service.create(identity_simple, input_data)
+
+    delete_draft = service.delete_draft
+
+    def fail_to_delete(identity, id_, **kwargs):
+        if id_ == failing.id:
+            raise RuntimeError("Cannot delete")
+        return delete_draft(identity, id_, **kwargs)
+
+    monkeypatch.setattr(service, 'delete_draft', fail_to_delete)
+
+    # The failing draft doesn't hold back the next expired draft
+    expire_drafts(batch_size=1)
+
+    assert service.read_draft(identity_simple, failing.id)
+    draft_model = service.draft_cls.model_cls
+    assert draft_model.query.filter_by(id=draft._record.id).count() == 0
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2022 CERN.
+#
+# Invenio-Drafts-Resources is free software; you can redistribute it and/or
+# modify it under the terms of the MIT License; see LICENSE file for more
+# details.
+
+"""Unit of work operations tests."""
+
+from unittest.mock import MagicMock
+
+from invenio_db import db
+from invenio_indexer.api import RecordIndexer
+from invenio_records.dumpers import ElasticsearchDumper
+from invenio_records_resources.services.uow import RecordCommitOp, \
+    RecordIndexOp, UnitOfWork
+from mock_module.api import Record
+
+from invenio_drafts_resources.services.records import uow
+from invenio_drafts_resources.services.records.uow import BulkUnitOfWork, \
+    RecordBulkIndexOp
+
+
+def test_bulk_index_op_coalesced(app, service, example_record, monkeypatch):
+    """Index operations are deduplicated into a single bulk request."""
+    bulk_index_records = MagicMock()
+    monkeypatch.setattr(uow, 'bulk_index_records', bulk_index_records)
+    draft = example_record
+    record = Record.publish(draft)
+    indexer = service.indexer
+
+    with UnitOfWork(db.session) as uow_:
+        uow_.register(RecordBulkIndexOp(draft, indexer=indexer))
+        uow_.register(RecordBulkIndexOp(record, indexer=indexer))
+        uow_.register(
+            RecordBulkIndexOp(record, indexer=indexer, index_refresh=True))
+        uow_.commit()
+
+    bulk_index_records.assert_called_once()
+    args, kwargs = bulk_index_records.call_args
+    assert list(args[1]) == [draft, record]
+    assert kwargs == {"refresh": True}
+
+
+def test_bulk_index_op_per_indexer(app, service, example_record, monkeypatch):
+    """Records registered with different indexers are not merged."""
+    bulk_index_records = MagicMock()
+    monkeypatch.setattr(uow, 'bulk_index_records', bulk_index_records)
+    draft = example_record
+    other_indexer = RecordIndexer(
+        record_to_index=service.record_to_index,
+        record_dumper=ElasticsearchDumper(),
+    )
+
+    with UnitOfWork(db.session) as uow_:
+        uow_.register(RecordBulkIndexOp(draft, indexer=service.indexer))
+        uow_.register(RecordBulkIndexOp(draft, indexer=service.indexer))
+        uow_.register(RecordBulkIndexOp(draft, indexer=other_indexer))
+        uow_.commit()
+
+    assert bulk_index_records.call_count == 2
+    (indexer, records), _ = bulk_index_records.call_args_list[0]
+    assert indexer is not other_indexer
+    assert list(records) == [draft]
+    (indexer, records), _ = bulk_index_records.call_args_list[1]
+    assert indexer is other_indexer
+    assert list(records) == [draft]
+
+
+def test_bulk_uow_refresh_indices(app, service, example_record, monkeypatch):
+    """The bulk unit of work collects the indices to refresh."""
+    monkeypatch.setattr(uow, 'bulk_index_records', MagicMock())
+    draft = example_record
+
+    with BulkUnitOfWork(db.session) as uow_:
+        uow_.register(
+            RecordCommitOp(draft, indexer=service.indexer, index_refresh=True))
+        uow_.commit()
+
+    index, _ = service.indexer._prepare_index(
+        *service.record_to_index(draft))
+    assert uow_.refresh_indices == {index}
+    uow.bulk_index_records.assert_called_once()
+
+
+def test_bulk_uow_index_op(app, service, example_record, monkeypatch):
+    """Index operations don't commit the record in a bulk unit of work."""
+    bulk_index_records = MagicMock()
+    monkeypatch.setattr(uow, 'bulk_index_records', bulk_index_records)
+    draft = example_record
+    revision_id = draft.revision_id
+
+    with BulkUnitOfWork(db.session) as uow_:
+        uow_.register(RecordIndexOp(draft, indexer=service.indexer))
+        uow_.commit()
+
+    assert draft.revision_id == revision_id
+    bulk_index_records.assert_called_once()
+    args, _ = bulk_index_records.call_args
+    assert list(args[1]) == [draft]